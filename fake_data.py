@@ -1,3 +1,17 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import queue
+import secrets
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
 import pymysql
 from faker import Faker
 
@@ -8,22 +22,11 @@ db_config = {
     "password": "",  # Change to your MySQL password
 }
 
-# Initialize Faker
-fake = Faker()
-
-# Establish a connection to MySQL
-connection = pymysql.connect(**db_config)
-cursor = connection.cursor()
-
-# Create the database if it doesn't exist
-try:
-    cursor.execute("CREATE DATABASE IF NOT EXISTS test_db")
-    print("Database 'test_db' created or already exists.")
-except pymysql.MySQLError as e:
-    print(f"Error creating database: {e}")
-
-# Use the created database
-cursor.execute("USE test_db")
+# Columns of the users table, in insert order
+USER_COLUMNS = (
+    "name", "address", "email", "phone_number", "company",
+    "job", "ssn", "credit_card_number", "date_of_birth", "website",
+)
 
 # Create the users table if it doesn't exist
 create_table_query = """
@@ -41,20 +44,36 @@ CREATE TABLE IF NOT EXISTS users (
     website VARCHAR(255)
 );
 """
-try:
-    cursor.execute(create_table_query)
-    print("Table 'users' created or already exists.")
-except pymysql.MySQLError as e:
-    print(f"Error creating table: {e}")
-
-# SQL query to insert data
-insert_query = """
-    INSERT INTO users (name, address, email, phone_number, company, job, ssn, credit_card_number, date_of_birth, website)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+
+# SQLite flavour of the same table, used as a local stand-in for MySQL
+sqlite_create_table_query = create_table_query.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+
+# SQL query to insert data. pymysql rewrites executemany() over this statement
+# into multi-row INSERT ... VALUES (...), (...) batches.
+insert_query = f"""
+    INSERT INTO users ({", ".join(USER_COLUMNS)})
+    VALUES ({", ".join(["%s"] * len(USER_COLUMNS))})
+"""
+sqlite_insert_query = insert_query.replace("%s", "?")
+
+# Optional secondary indexes added with --email-index. They aren't part of
+# the users schema; when asked for, they are created after the rows are
+# loaded so the inserts don't have to maintain them.
+user_indexes = {
+    "idx_users_email": "email",
+}
+
+# Bulk load one CSV chunk written by write_csv_chunks()
+load_data_query = f"""
+    LOAD DATA LOCAL INFILE %s INTO TABLE users
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+    LINES TERMINATED BY '\\r\\n'
+    ({", ".join(USER_COLUMNS)})
 """
 
-# Generate and insert 1000 fake data records
-for _ in range(1000):
+
+def generate_record(fake):
+    """Generate one fake users row as a tuple ordered like USER_COLUMNS."""
     name = fake.name()
     address = fake.address().replace("\n", ", ")  # Replace newlines in address
     email = fake.email()
@@ -66,17 +85,620 @@ for _ in range(1000):
     date_of_birth = fake.date_of_birth().strftime('%Y-%m-%d')
     website = fake.url()
 
-    # Data to insert
-    data = (name, address, email, phone_number, company, job, ssn, credit_card_number, date_of_birth, website)
+    return (name, address, email, phone_number, company, job, ssn, credit_card_number, date_of_birth, website)
+
+
+def generate_records(count, seed=None):
+    """Lazily generate count records from a single Faker instance, seeded if seed is given."""
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    for _ in range(count):
+        yield generate_record(fake)
+
+
+def luhn_check_digits(digits):
+    """Return the Luhn check digit for each row of a 2-D array of payload digits."""
+    # Walking right to left from the check digit, every other payload digit
+    # starting with the rightmost one is doubled
+    doubled = digits[:, ::-1].copy()
+    doubled[:, ::2] *= 2
+    doubled[doubled > 9] -= 9
+    return (10 - doubled.sum(axis=1) % 10) % 10
+
+
+def digits_to_strings(digits, dashes=()):
+    """Format rows of a 2-D digit array as strings, inserting '-' before the given column offsets."""
+    import numpy as np
+
+    ascii_digits = (digits + ord("0")).astype(np.uint8)
+    for offset in sorted(dashes, reverse=True):
+        ascii_digits = np.insert(ascii_digits, offset, ord("-"), axis=1)
+    width = ascii_digits.shape[1]
+    return np.ascontiguousarray(ascii_digits).view(f"S{width}").ravel().astype(f"U{width}").tolist()
+
+
+def vectorized_records(count, seed=None, chunk_rows=10000, pool_size=2000):
+    """Lazily generate count records column by column with NumPy.
+
+    Text columns are sampled from pools of pre-drawn Faker values, while
+    dates of birth, SSNs, phone numbers and Luhn-valid credit card numbers
+    are built in bulk from random integer arrays, chunk_rows rows at a time.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("The numpy engine requires numpy: pip install numpy")
+
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    rng = np.random.default_rng(seed)
+
+    # Pre-drawn value pools for the free text columns, never larger than the
+    # number of rows they have to cover
+    pool_size = max(1, min(pool_size, count))
+    names = np.array([fake.name() for _ in range(pool_size)])
+    addresses = np.array([fake.address().replace("\n", ", ") for _ in range(pool_size)])
+    companies = np.array([fake.company() for _ in range(pool_size)])
+    jobs = np.array([fake.job() for _ in range(pool_size)])
+    websites = np.array([fake.url() for _ in range(pool_size)])
+    user_names = np.array([fake.user_name() for _ in range(pool_size)])
+    domains = np.array([fake.free_email_domain() for _ in range(pool_size)])
+
+    today = np.datetime64("today", "D")
+
+    for start in range(0, count, chunk_rows):
+        n = min(chunk_rows, count - start)
+
+        name = names[rng.integers(pool_size, size=n)].tolist()
+        address = addresses[rng.integers(pool_size, size=n)].tolist()
+        company = companies[rng.integers(pool_size, size=n)].tolist()
+        job = jobs[rng.integers(pool_size, size=n)].tolist()
+        website = websites[rng.integers(pool_size, size=n)].tolist()
+        email = np.char.add(
+            np.char.add(user_names[rng.integers(pool_size, size=n)], rng.integers(100, size=n).astype(str)),
+            np.char.add("@", domains[rng.integers(pool_size, size=n)]),
+        ).tolist()
+
+        # Same 0-115 year age range as Faker's date_of_birth()
+        date_of_birth = (today - rng.integers(0, 115 * 365, size=n).astype("timedelta64[D]")).astype(str).tolist()
+
+        # NPA-NXX-XXXX with area and exchange codes starting 2-9
+        phone_digits = rng.integers(0, 10, size=(n, 10))
+        phone_digits[:, [0, 3]] = rng.integers(2, 10, size=(n, 2))
+        phone_number = digits_to_strings(phone_digits, dashes=(3, 6))
+
+        # AAA-GG-SSSS, skipping the never-issued 000 and 666 areas and 9xx
+        area = rng.integers(1, 899, size=n)
+        area[area == 666] = 667
+        ssn_digits = np.column_stack([
+            area // 100, area // 10 % 10, area % 10,
+            rng.integers(0, 10, size=(n, 6)),
+        ])
+        ssn_digits[:, 3:5] = np.where(ssn_digits[:, 3:5].sum(axis=1, keepdims=True) == 0, [0, 1], ssn_digits[:, 3:5])
+        ssn_digits[:, 5:9] = np.where(ssn_digits[:, 5:9].sum(axis=1, keepdims=True) == 0, [0, 0, 0, 1], ssn_digits[:, 5:9])
+        ssn = digits_to_strings(ssn_digits, dashes=(3, 5))
+
+        # 16-digit Visa (4...) or Mastercard (51-55...) numbers with a Luhn check digit
+        card_digits = rng.integers(0, 10, size=(n, 16))
+        visa = rng.random(n) < 0.5
+        card_digits[visa, 0] = 4
+        card_digits[~visa, 0] = 5
+        card_digits[~visa, 1] = rng.integers(1, 6, size=(~visa).sum())
+        card_digits[:, 15] = luhn_check_digits(card_digits[:, :15])
+        credit_card_number = digits_to_strings(card_digits)
+
+        yield from zip(name, address, email, phone_number, company, job, ssn, credit_card_number, date_of_birth, website)
+
+
+# How often the parent checks that a generator worker is still alive while
+# waiting for its next batch
+WORKER_POLL_SECONDS = 1.0
+
+# Record generators selectable with --engine
+ENGINES = {
+    "faker": generate_records,
+    "numpy": vectorized_records,
+}
+
+
+def generate_shard(count, seed, batch_size, batch_queue, engine="faker"):
+    """Worker process body: generate count records and put them on batch_queue in batches.
+
+    The worker seeds its own Faker with seed, and a None sentinel marks the
+    end of the shard. If generating fails, a RuntimeError carrying the
+    worker's traceback is put on the queue instead, for the parent to raise.
+    """
+    try:
+        batch = []
+        for record in ENGINES[engine](count, seed):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                batch_queue.put(batch)
+                batch = []
+        if batch:
+            batch_queue.put(batch)
+    except Exception:
+        batch_queue.put(RuntimeError(f"Record generation failed in a worker process:\n{traceback.format_exc()}"))
+        return
+    batch_queue.put(None)
+
+
+def next_batch(batch_queue, process):
+    """Wait for the next batch from a generate_shard() worker, raising if it failed or died."""
+    while True:
+        try:
+            batch = batch_queue.get(timeout=WORKER_POLL_SECONDS)
+            break
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            # Anything it put before exiting has been flushed to the queue by now
+            try:
+                batch = batch_queue.get(timeout=WORKER_POLL_SECONDS)
+                break
+            except queue.Empty:
+                raise RuntimeError(f"Worker process {process.pid} exited with code {process.exitcode} "
+                                   f"before finishing its records")
+    if isinstance(batch, Exception):
+        raise batch
+    return batch
+
+
+def parallel_records(rows, workers, seed=None, batch_size=1000, queue_size=4, engine="faker"):
+    """Generate rows records across worker processes and yield them in one stream.
+
+    Every worker feeds its own bounded queue of at most queue_size batches,
+    and the queues are drained round-robin, so a given seed and worker count
+    always yields the same records in the same order. Worker i is seeded
+    with seed + i; without a seed, each worker gets a random seed of its own,
+    since forked workers inherit the same Faker random state and would
+    otherwise all generate the same records.
+    """
+    queues = []
+    processes = []
+    for worker_index in range(workers):
+        count = rows // workers + (1 if worker_index < rows % workers else 0)
+        shard_seed = seed + worker_index if seed is not None else secrets.randbits(32)
+        batch_queue = multiprocessing.Queue(maxsize=queue_size)
+        process = multiprocessing.Process(target=generate_shard, args=(count, shard_seed, batch_size, batch_queue, engine),
+                                          daemon=True)
+        process.start()
+        queues.append(batch_queue)
+        processes.append(process)
+
+    try:
+        pending = list(zip(queues, processes))
+        while pending:
+            for shard in list(pending):
+                batch = next_batch(*shard)
+                if batch is None:
+                    pending.remove(shard)
+                else:
+                    yield from batch
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def connect_mysql(config):
+    """Connect to MySQL and make sure test_db.users exists."""
+    connection = pymysql.connect(**config)
+    cursor = connection.cursor()
+
+    # Create the database if it doesn't exist
+    try:
+        cursor.execute("CREATE DATABASE IF NOT EXISTS test_db")
+        print("Database 'test_db' created or already exists.", file=sys.stderr)
+    except pymysql.MySQLError as e:
+        print(f"Error creating database: {e}", file=sys.stderr)
+
+    # Use the created database
+    cursor.execute("USE test_db")
+
+    try:
+        cursor.execute(create_table_query)
+        print("Table 'users' created or already exists.", file=sys.stderr)
+    except pymysql.MySQLError as e:
+        print(f"Error creating table: {e}", file=sys.stderr)
+
+    cursor.close()
+    return connection
+
+
+def connect_sqlite(path):
+    """Open a SQLite database with the users table, as a local stand-in for MySQL."""
+    connection = sqlite3.connect(path)
+    connection.execute(sqlite_create_table_query)
+    print(f"Table 'users' created or already exists in {path}.", file=sys.stderr)
+    return connection
+
+
+def user_records(rows, seed=None, workers=1, batch_size=1000, engine="faker"):
+    """Lazily yield rows users records as tuples ordered like USER_COLUMNS.
+
+    This is the entry point for reusing the generator from other code: with
+    workers > 1 generation is spread over processes, otherwise it runs inline.
+    engine picks a generator from ENGINES.
+    """
+    if workers > 1:
+        return parallel_records(rows, workers, seed, batch_size, engine=engine)
+    return ENGINES[engine](rows, seed)
+
+
+def batched(records, batch_size):
+    """Group an iterable of records into lists of at most batch_size records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class DatabaseSink:
+    """Insert batches with executemany(), committing every commit_every batches.
+
+    With fast_session, MySQL unique and foreign key checks are switched off
+    for this session while loading and switched back on at close(). With
+    build_indexes, user_indexes are created at close(), once the rows are in.
+    Rows per second of time spent writing is reported at close().
+    """
+
+    def __init__(self, connection, query, commit_every=10, sqlite=False, fast_session=False, build_indexes=False, name="connection"):
+        self.connection = connection
+        self.query = query
+        self.commit_every = commit_every
+        self.sqlite = sqlite
+        self.fast_session = fast_session and not sqlite
+        self.build_indexes = build_indexes
+        self.name = name
+        self.cursor = connection.cursor()
+        self.batches = 0
+        self.rows = 0
+        self.busy_seconds = 0.0
+        if self.fast_session:
+            self.cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+
+    def write(self, batch):
+        start = time.perf_counter()
+        self.cursor.executemany(self.query, batch)
+        self.batches += 1
+        if self.batches % self.commit_every == 0:
+            self.connection.commit()
+        self.rows += len(batch)
+        self.busy_seconds += time.perf_counter() - start
+
+    def close(self):
+        # Commit whatever is left of the last commit interval, then build any
+        # requested secondary indexes once at the end
+        start = time.perf_counter()
+        self.connection.commit()
+        self.busy_seconds += time.perf_counter() - start
+        if self.fast_session:
+            self.cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+        self.cursor.close()
+        if self.build_indexes:
+            create_indexes(self.connection, sqlite=self.sqlite)
+        self.connection.close()
+        rate = self.rows / self.busy_seconds if self.busy_seconds else 0.0
+        print(f"{self.name}: {self.rows} rows in {self.busy_seconds:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+class ConnectionPoolSink:
+    """Spread batches over several DatabaseSinks, each written from its own thread.
+
+    Batches are handed out through a bounded queue, so whichever connection
+    is free takes the next one. With build_indexes, user_indexes are built
+    once, after every writer has finished.
+    """
+
+    def __init__(self, sinks, queue_size=None, build_indexes=False):
+        self.sinks = sinks
+        self.build_indexes = build_indexes
+        self.queue = queue.Queue(maxsize=queue_size or 2 * len(sinks))
+        self.errors = []
+        self.threads = [threading.Thread(target=self._drain, args=(sink,), daemon=True) for sink in sinks]
+        for thread in self.threads:
+            thread.start()
+
+    def _drain(self, sink):
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            if self.errors:
+                continue  # keep draining so write() never blocks on a dead pool
+            try:
+                sink.write(batch)
+            except Exception as e:
+                self.errors.append(e)
+
+    def write(self, batch):
+        if self.errors:
+            raise self.errors[0]
+        self.queue.put(batch)
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        for sink in self.sinks:
+            sink.close()
+        if self.errors:
+            raise self.errors[0]
+        if not self.build_indexes:
+            return
+        connection = connect_mysql(db_config)
+        try:
+            create_indexes(connection)
+        finally:
+            connection.close()
+
+
+class CSVSink:
+    """Write records to a CSV file with a header row; path "-" means stdout."""
+
+    def __init__(self, path):
+        self.handle = sys.stdout if path == "-" else open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.handle)
+        self.writer.writerow(USER_COLUMNS)
+
+    def write(self, batch):
+        self.writer.writerows(batch)
+
+    def close(self):
+        if self.handle is sys.stdout:
+            self.handle.flush()
+        else:
+            self.handle.close()
+
+
+class JSONLinesSink:
+    """Write one JSON object per record; path "-" means stdout."""
+
+    def __init__(self, path):
+        self.handle = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+
+    def write(self, batch):
+        self.handle.writelines(json.dumps(dict(zip(USER_COLUMNS, record))) + "\n" for record in batch)
+
+    def close(self):
+        if self.handle is sys.stdout:
+            self.handle.flush()
+        else:
+            self.handle.close()
+
+
+class ParquetSink:
+    """Write each batch as a row group of a Parquet file (needs pyarrow)."""
+
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("The parquet sink requires pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.schema = pa.schema([(column, pa.string()) for column in USER_COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, batch):
+        columns = [list(values) for values in zip(*batch)]
+        self.writer.write_table(self.pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_sink(spec, args):
+    """Build a sink from a --sink spec of the form KIND or KIND:PATH."""
+    kind, _, path = spec.partition(":")
+    if kind == "mysql":
+        if args.connections > 1:
+            return ConnectionPoolSink([
+                DatabaseSink(connect_mysql(db_config), insert_query, args.commit_every, fast_session=args.fast_session,
+                             name=f"connection {index}")
+                for index in range(args.connections)
+            ], build_indexes=args.email_index)
+        return DatabaseSink(connect_mysql(db_config), insert_query, args.commit_every, fast_session=args.fast_session,
+                            build_indexes=args.email_index)
+    if not path:
+        raise ValueError(f"sink '{kind}' needs a path, e.g. {kind}:users.{kind}")
+    if kind == "sqlite":
+        return DatabaseSink(connect_sqlite(path), sqlite_insert_query, args.commit_every, sqlite=True,
+                            build_indexes=args.email_index)
+    if kind == "csv":
+        return CSVSink(path)
+    if kind == "jsonl":
+        return JSONLinesSink(path)
+    if kind == "parquet":
+        return ParquetSink(path)
+    raise ValueError(f"unknown sink '{kind}', expected one of: mysql, sqlite, csv, jsonl, parquet")
+
+
+def write_to_sinks(records, sinks, batch_size=1000):
+    """Stream records to every sink in batches of batch_size, then close the sinks.
+
+    Only one batch is in memory at a time, however many records there are.
+    Returns the number of records written.
+    """
+    total = 0
+    try:
+        for batch in batched(records, batch_size):
+            for sink in sinks:
+                sink.write(batch)
+            total += len(batch)
+    finally:
+        for sink in sinks:
+            sink.close()
+    return total
+
+
+def create_indexes(connection, sqlite=False):
+    """Create any of user_indexes that don't exist yet."""
+    cursor = connection.cursor()
+    for index_name, column in user_indexes.items():
+        if sqlite:
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON users ({column})")
+            continue
+        cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'users' AND index_name = %s",
+            (index_name,),
+        )
+        if cursor.fetchone() is None:
+            cursor.execute(f"CREATE INDEX {index_name} ON users ({column})")
+            print(f"Index '{index_name}' created.", file=sys.stderr)
+    connection.commit()
+    cursor.close()
+
+
+def write_csv_chunks(records, directory, chunk_rows=100000):
+    """Stream records into CSV files of at most chunk_rows rows in directory.
+
+    Yields the path of each chunk as soon as it is complete, so only one
+    chunk is ever being written and no chunk is held in memory.
+    """
+    chunk_index = 0
+    handle = None
+    written = 0
+    try:
+        for record in records:
+            if handle is None:
+                path = os.path.join(directory, f"users_{chunk_index:05d}.csv")
+                handle = open(path, "w", newline="", encoding="utf-8")
+                writer = csv.writer(handle, quoting=csv.QUOTE_ALL)
+                written = 0
+            writer.writerow(record)
+            written += 1
+            if written >= chunk_rows:
+                handle.close()
+                handle = None
+                chunk_index += 1
+                yield path
+        if handle is not None:
+            handle.close()
+            handle = None
+            yield path
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+def bulk_load(connection, records, chunk_rows=100000):
+    """Load records through temporary CSV chunks and LOAD DATA LOCAL INFILE.
+
+    Each chunk is committed and deleted once loaded. Returns the number of rows loaded.
+    """
+    cursor = connection.cursor()
+    total = 0
+    with tempfile.TemporaryDirectory(prefix="fake_data_") as directory:
+        for path in write_csv_chunks(records, directory, chunk_rows):
+            total += cursor.execute(load_data_query, (path,))
+            connection.commit()
+            os.remove(path)
+    cursor.close()
+    return total
+
+
+def compare_engines(rows, seed=None):
+    """Print the generation rate of every engine for rows records, and each one's speedup over faker."""
+    rates = {}
+    for engine, generate in ENGINES.items():
+        start = time.perf_counter()
+        for _ in generate(rows, seed):
+            pass
+        elapsed = time.perf_counter() - start
+        rates[engine] = rows / elapsed if elapsed else float("inf")
+    for engine, rate in rates.items():
+        print(f"{engine:>6}: {rate:12,.0f} rows/s ({rate / rates['faker']:.1f}x faker)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed test_db.users with fake records.")
+    parser.add_argument("--rows", type=int, default=1000, help="number of records to generate (default: 1000)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per multi-row INSERT (default: 1000)")
+    parser.add_argument("--commit-every", type=int, default=10, help="commit after this many batches (default: 10)")
+    parser.add_argument("--workers", type=int, default=1, help="generator processes feeding the single DB writer (default: 1)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="faker",
+                        help="record generator: per-row Faker calls, or column-wise NumPy over Faker value pools (default: faker)")
+    parser.add_argument("--compare-engines", action="store_true",
+                        help="time --rows records from each engine without writing them anywhere, then exit")
+    parser.add_argument("--seed", type=int, help="seed Faker so repeated runs produce the same dataset")
+    parser.add_argument("--connections", type=int, default=1, help="parallel MySQL writer connections (default: 1)")
+    parser.add_argument("--fast-session", action="store_true",
+                        help="disable unique_checks and foreign_key_checks on the MySQL writer sessions during the load")
+    parser.add_argument("--sqlite", metavar="PATH", help="write to a SQLite database at PATH instead of MySQL")
+    parser.add_argument("--sink", action="append", default=[], metavar="KIND[:PATH]",
+                        help="where to write the records: mysql, sqlite:PATH, csv:PATH, jsonl:PATH or parquet:PATH "
+                             "(PATH '-' is stdout for csv/jsonl). Repeat to fill several sinks from one pass.")
+    parser.add_argument("--bulk", action="store_true", help="load through CSV chunks and LOAD DATA LOCAL INFILE (MySQL only)")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="rows per CSV chunk in --bulk mode (default: 100000)")
+    parser.add_argument("--email-index", action="store_true",
+                        help="also add an index on users.email, built once after the rows are loaded")
+    parser.add_argument("--emit-only", metavar="DIR", help="only write the --bulk CSV chunks to DIR, without touching a database")
+    args = parser.parse_args(argv)
+    if args.rows < 0 or args.batch_size <= 0 or args.commit_every <= 0 or args.workers <= 0 or args.chunk_rows <= 0 or args.connections <= 0:
+        parser.error("--rows must be >= 0, --batch-size, --commit-every, --workers, --chunk-rows and --connections must be positive")
+    if args.bulk and args.sqlite:
+        parser.error("--bulk needs MySQL's LOAD DATA and can't be combined with --sqlite")
+    if args.sink and (args.sqlite or args.bulk or args.emit_only):
+        parser.error("--sink can't be combined with --sqlite, --bulk or --emit-only")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.compare_engines:
+        compare_engines(args.rows, args.seed)
+        return
+
+    # Generate the fake data records
+    records = user_records(args.rows, args.seed, args.workers, args.batch_size, args.engine)
+
+    if args.emit_only:
+        os.makedirs(args.emit_only, exist_ok=True)
+        chunks = list(write_csv_chunks(records, args.emit_only, args.chunk_rows))
+        print(f"{args.rows} fake records written to {len(chunks)} CSV file(s) in {args.emit_only}.", file=sys.stderr)
+        return
+
+    if args.bulk:
+        connection = connect_mysql({**db_config, "local_infile": True})
+        try:
+            inserted = bulk_load(connection, records, args.chunk_rows)
+            if args.email_index:
+                create_indexes(connection)
+        finally:
+            connection.close()
+        print(f"{inserted} fake records inserted successfully!", file=sys.stderr)
+        return
 
-    # Execute the insert query
-    cursor.execute(insert_query, data)
+    specs = args.sink or [f"sqlite:{args.sqlite}" if args.sqlite else "mysql"]
+    sinks = []
+    try:
+        for spec in specs:
+            sinks.append(open_sink(spec, args))
+    except Exception as e:
+        for sink in sinks:
+            sink.close()
+        if isinstance(e, ValueError):
+            sys.exit(f"Error: {e}")
+        raise
+    start = time.perf_counter()
+    written = write_to_sinks(records, sinks, args.batch_size)
+    elapsed = time.perf_counter() - start
 
-# Commit the changes to the database
-connection.commit()
+    print(f"{written} fake records written to {len(sinks)} sink(s) successfully "
+          f"in {elapsed:.2f}s ({written / elapsed if elapsed else 0:,.0f} rows/s)!", file=sys.stderr)
 
-# Close the cursor and connection
-cursor.close()
-connection.close()
 
-print("1000 fake records inserted successfully!")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sqlite3
+import sys
+import tempfile
+import time
+
+import fake_data
+from process_memory import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+# Records generated up front and cycled through for the insert stage, so that
+# stage measures inserting and not generating
+INSERT_POOL_SIZE = 10000
+
+# How often benchmark() checks that a case's process is still alive
+CASE_POLL_SECONDS = 1.0
+
+
+def run_generate(rows, engine, seed):
+    for _ in fake_data.user_records(rows, seed, engine=engine):
+        pass
+
+
+def run_insert(rows, batch_size, commit_every, pool, directory):
+    connection = sqlite3.connect(os.path.join(directory, "bench.db"))
+    connection.execute(fake_data.sqlite_create_table_query)
+    sink = fake_data.DatabaseSink(connection, fake_data.sqlite_insert_query, commit_every, sqlite=True, name="sqlite")
+    records = itertools.islice(itertools.cycle(pool), rows)
+    fake_data.write_to_sinks(records, [sink], batch_size)
+
+
+def run_case(case, pool, results):
+    """Child process body: run one benchmark case and put its measurements, or its error, on results."""
+    try:
+        with tempfile.TemporaryDirectory(prefix="fake_data_bench_") as directory:
+            reset_peak_rss()
+            baseline = current_rss_mb()
+            start = time.perf_counter()
+            if case["stage"] == "generate":
+                run_generate(case["rows"], case["engine"], case["seed"])
+            else:
+                run_insert(case["rows"], case["batch_size"], case["commit_every"], pool, directory)
+            seconds = time.perf_counter() - start
+            peak = peak_rss_mb()
+    except Exception as e:
+        results.put({**case, "error": f"{type(e).__name__}: {e}"})
+        return
+
+    results.put({
+        **case,
+        "seconds": round(seconds, 4),
+        "rows_per_second": round(case["rows"] / seconds, 1) if seconds else None,
+        "peak_rss_mb": None if peak is None else round(peak, 1),
+        "stage_rss_growth_mb": None if peak is None else round(peak - baseline, 1),
+    })
+
+
+def benchmark(case, pool=None):
+    """Run a case in a fresh interpreter so peak memory isn't inherited from earlier cases.
+
+    A case that fails, or whose process dies, comes back with an "error"
+    field instead of its measurements.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=run_case, args=(case, pool, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=CASE_POLL_SECONDS)
+            break
+        except queue.Empty:
+            if process.is_alive():
+                continue
+            try:
+                result = results.get(timeout=CASE_POLL_SECONDS)
+            except queue.Empty:
+                result = {**case, "error": f"benchmark process exited with code {process.exitcode}"}
+            break
+    process.join()
+    return result
+
+
+def build_cases(args):
+    cases = []
+    for rows in args.rows:
+        for engine in args.engines:
+            cases.append({"stage": "generate", "rows": rows, "engine": engine, "seed": args.seed})
+        for batch_size in args.batch_sizes:
+            cases.append({"stage": "insert", "rows": rows, "batch_size": batch_size,
+                          "commit_every": args.commit_every, "seed": args.seed})
+    return cases
+
+
+def case_key(result):
+    return tuple(result.get(field) for field in ("stage", "rows", "engine", "batch_size"))
+
+
+def describe(result):
+    if result["stage"] == "generate":
+        return f"generate rows={result['rows']:<8} engine={result['engine']}"
+    return f"insert   rows={result['rows']:<8} batch={result['batch_size']}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fake_data.py generation and SQLite insert throughput.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000],
+                        help="row counts to run (default: 1000 100000 1000000)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="insert batch sizes to run (default: 100 1000 10000)")
+    parser.add_argument("--engines", nargs="+", choices=sorted(fake_data.ENGINES), default=sorted(fake_data.ENGINES),
+                        help="generation engines to run (default: all)")
+    parser.add_argument("--commit-every", type=int, default=10, help="commit interval for the insert stage (default: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Faker/NumPy seed (default: 0)")
+    parser.add_argument("--output", default="fake_data_bench.json", help="where to save the JSON results (default: fake_data_bench.json)")
+    parser.add_argument("--baseline", metavar="JSON", help="earlier results file to compare rows/s against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = {case_key(result): result for result in json.load(file)["results"]}
+
+    # Generated once here and handed to each insert case, so building it
+    # doesn't count towards the insert stage's peak memory
+    pool = list(fake_data.user_records(INSERT_POOL_SIZE, args.seed, engine="numpy"))
+
+    results = []
+    for case in build_cases(args):
+        result = benchmark(case, pool if case["stage"] == "insert" else None)
+        results.append(result)
+        if "error" in result:
+            print(f"{describe(result)}: FAILED ({result['error']})")
+            continue
+
+        line = f"{describe(result)}: {result['rows_per_second']:>12,.0f} rows/s"
+        if result["peak_rss_mb"] is not None:
+            line += f", peak RSS {result['peak_rss_mb']:.1f} MB (+{result['stage_rss_growth_mb']:.1f} MB in stage)"
+        previous = baseline.get(case_key(result))
+        if previous and previous.get("rows_per_second"):
+            line += f", {result['rows_per_second'] / previous['rows_per_second']:.2f}x baseline"
+        print(line)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+    failed = sum("error" in result for result in results)
+    if failed:
+        sys.exit(f"{failed} benchmark case(s) failed")
+
+
+if __name__ == "__main__":
+    main()
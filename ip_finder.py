@@ -1,6 +1,239 @@
-import tkinter as tk
-from tkinter import messagebox
+import argparse
+import collections
+import concurrent.futures
+import itertools
+import queue
 import socket
+import sqlite3
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+
+# Defaults for batch lookups
+BATCH_WORKERS = 64
+LOOKUP_TIMEOUT = 5.0
+
+# Defaults for the lookup cache. gethostbyname() doesn't report record TTLs,
+# so answers are kept for a fixed time, failures for a shorter one.
+CACHE_SIZE = 100000
+CACHE_TTL = 300.0
+CACHE_NEGATIVE_TTL = 60.0
+
+
+def read_hostnames(path):
+    """Read one hostname per line from path ("-" for stdin), skipping blank lines and # comments."""
+    with (open(path) if path != "-" else sys.stdin) as file:
+        for line in file:
+            hostname = line.split("#", 1)[0].strip()
+            if hostname:
+                yield hostname
+
+
+def hosts_file_resolver(path):
+    """Build a resolver that answers from an /etc/hosts style file instead of DNS.
+
+    Handy as a local stub for testing batch mode; unknown names raise
+    socket.gaierror just like the system resolver.
+    """
+    table = {}
+    with open(path) as file:
+        for line in file:
+            fields = line.split("#", 1)[0].split()
+            for name in fields[1:]:
+                table.setdefault(name.lower(), fields[0])
+
+    def resolve(hostname):
+        try:
+            return table[hostname.lower()]
+        except KeyError:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+
+    return resolve
+
+
+class DNSCache:
+    """LRU cache of hostname lookups with TTL expiry and negative caching.
+
+    resolve() answers from the cache while an entry is fresh and otherwise
+    calls resolver. socket.gaierror failures are cached too and re-raised
+    on a hit. With path, entries are also kept in a SQLite file so a new
+    process starts warm. Safe to use from several threads.
+    """
+
+    def __init__(self, resolver=socket.gethostbyname, max_entries=CACHE_SIZE, ttl=CACHE_TTL,
+                 negative_ttl=CACHE_NEGATIVE_TTL, path=None, commit_every=100):
+        self.resolver = resolver
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        # hostname -> (ip, error_code, error, expires), ip is None for cached failures
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.db = None
+        self.unsaved = 0
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS dns_cache "
+                            "(hostname TEXT PRIMARY KEY, ip TEXT, error_code INTEGER, error TEXT, expires REAL)")
+            self.db.execute("DELETE FROM dns_cache WHERE expires <= ?", (time.time(),))
+            rows = self.db.execute("SELECT hostname, ip, error_code, error, expires FROM dns_cache "
+                                   "ORDER BY expires DESC LIMIT ?", (max_entries,)).fetchall()
+            for hostname, *entry in reversed(rows):
+                self.entries[hostname] = tuple(entry)
+            self.db.commit()
+
+    def lookup(self, hostname):
+        """Return the fresh cached (ip, error_code, error, expires) entry for hostname, or None.
+
+        A returned entry counts as a hit; None does not count as a miss yet.
+        """
+        key = hostname.lower()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[3] <= time.time():
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def resolve(self, hostname):
+        entry = self.lookup(hostname)
+        if entry is not None:
+            ip_address, error_code, error, _ = entry
+            if ip_address is None:
+                raise socket.gaierror(error_code, error)
+            return ip_address
+
+        key = hostname.lower()
+        with self.lock:
+            self.misses += 1
+        try:
+            ip_address = self.resolver(hostname)
+        except socket.gaierror as e:
+            error_code, error = (e.errno, e.strerror) if e.strerror else (None, str(e))
+            self._store(key, (None, error_code, error, time.time() + self.negative_ttl))
+            raise
+        self._store(key, (ip_address, None, None, time.time() + self.ttl))
+        return ip_address
+
+    def _store(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                if self.db is not None:
+                    self.db.execute("DELETE FROM dns_cache WHERE hostname = ?", (evicted,))
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO dns_cache VALUES (?, ?, ?, ?, ?)", (key, *entry))
+                self.unsaved += 1
+                if self.unsaved >= self.commit_every:
+                    self.db.commit()
+                    self.unsaved = 0
+
+    def stats(self):
+        return f"Cache: {self.hits} hits, {self.misses} misses, {len(self.entries)} entries"
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.commit()
+                self.db.close()
+                self.db = None
+
+
+# Cache used by the GUI and batch mode; replaced from the command line options
+dns_cache = DNSCache()
+
+
+def resolve_many(hostnames, workers=BATCH_WORKERS, timeout=LOOKUP_TIMEOUT, resolver=socket.gethostbyname, stop_event=None, cache=None):
+    """Resolve hostnames concurrently, yielding (hostname, ip, error) as each lookup finishes.
+
+    Lookups run on a pool of at most workers daemon threads, and at most
+    workers hostnames are in flight at once. A hostname still unanswered
+    after timeout seconds is reported with a "timed out" error and its slot
+    goes to the next one, so a hung resolver call never holds up the rest;
+    the hung thread is left to finish, and until it does the pool has one
+    thread fewer. A hostname that times out while waiting for a free thread
+    is never looked up, so a resolver that hangs on every call still can't
+    grow the pool. Setting stop_event stops handing out new lookups. With a
+    DNSCache, fresh cached answers are yielded straight away without a
+    thread and misses go through cache.resolve.
+    """
+    if cache is not None:
+        resolver = cache.resolve
+    hostnames = iter(hostnames)
+    jobs = queue.Queue()
+    results = queue.Queue()
+    in_flight = {}
+    threads = []
+
+    def lookup_thread():
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            token, hostname = job
+            if token not in in_flight:
+                continue  # Timed out while waiting for a thread
+            try:
+                results.put((token, hostname, resolver(hostname), None))
+            except Exception as e:
+                results.put((token, hostname, None, str(e) or type(e).__name__))
+
+    try:
+        for token in itertools.count():
+            if len(in_flight) < workers and not (stop_event and stop_event.is_set()):
+                hostname = next(hostnames, None)
+                entry = cache.lookup(hostname) if cache is not None and hostname is not None else None
+                if entry is not None:
+                    ip_address, error_code, error, _ = entry
+                    yield hostname, ip_address, None if ip_address else str(socket.gaierror(error_code, error))
+                    continue
+                if hostname is not None:
+                    in_flight[token] = (hostname, time.monotonic())
+                    jobs.put((token, hostname))
+                    if len(threads) < workers:
+                        threads.append(threading.Thread(target=lookup_thread, daemon=True))
+                        threads[-1].start()
+                    continue
+            if not in_flight:
+                return
+
+            oldest = min(started for _, started in in_flight.values())
+            try:
+                done_token, hostname, ip_address, error = results.get(timeout=max(0.0, oldest + timeout - time.monotonic()))
+                if in_flight.pop(done_token, None) is not None:
+                    yield hostname, ip_address, error
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            for expired_token, (hostname, started) in list(in_flight.items()):
+                if now - started >= timeout:
+                    del in_flight[expired_token]
+                    yield hostname, None, "timed out"
+    finally:
+        # Idle threads exit now, hung ones once their lookup returns
+        in_flight.clear()
+        for _ in threads:
+            jobs.put(None)
+
+
+# Single lookups run here so a slow resolver never blocks the Tk main loop
+lookup_executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+# Hostname -> Future of its in-flight single lookup
+pending_lookups = {}
+
+# Set to cancel the running batch, None when no batch is running
+batch_stop = None
+
 
 # Function to fetch IP Address
 def get_ip():
@@ -9,49 +242,222 @@ def get_ip():
         messagebox.showerror("Error", "Please enter a valid URL.")
         return
 
+    # Coalesce repeated clicks: one pending lookup per hostname
+    if url in pending_lookups:
+        return
+
+    future = lookup_executor.submit(dns_cache.resolve, url)
+    pending_lookups[url] = future
+    result_label.config(text=f"Looking up {url}...", fg="#333")
+    update_busy()
+    root.after(50, poll_lookup, url, future)
+
+
+def poll_lookup(url, future):
+    # Runs on the Tk thread until the lookup finishes or is cancelled
+    if pending_lookups.get(url) is not future:
+        return
+    if not future.done():
+        root.after(50, poll_lookup, url, future)
+        return
+
+    del pending_lookups[url]
     try:
-        ip_address = socket.gethostbyname(url)
+        ip_address = future.result()
         result_label.config(text=f"IP Address: {ip_address}", fg="green")
-    except socket.gaierror:
+    except (socket.gaierror, socket.herror, UnicodeError):
         result_label.config(text="Invalid URL or network error.", fg="red")
+    cache_label.config(text=dns_cache.stats())
+    update_busy()
+
+
+def cancel_lookups():
+    # The resolver call itself can't be interrupted; its answer is just dropped
+    for future in pending_lookups.values():
+        future.cancel()
+    pending_lookups.clear()
+    if batch_stop is not None:
+        batch_stop.set()
+    result_label.config(text="Lookup cancelled.", fg="#333")
+    update_busy()
+
+
+def update_busy():
+    # Show the progress bar and enable Cancel while anything is being resolved
+    if pending_lookups or batch_stop is not None:
+        progress_bar.start(10)
+        cancel_button.config(state=tk.NORMAL)
+    else:
+        progress_bar.stop()
+        cancel_button.config(state=tk.DISABLED)
+
+
+# Function to resolve every hostname in a file without blocking the window
+def resolve_file():
+    global batch_stop
+
+    file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All Files", "*.*")])
+    if not file_path:
+        return
+    try:
+        hostnames = list(read_hostnames(file_path))
+    except OSError as e:
+        messagebox.showerror("Error", f"Failed to read file: {e}")
+        return
+
+    batch_list.delete(0, tk.END)
+    batch_button.config(state=tk.DISABLED)
+    result_label.config(text=f"Resolving {len(hostnames)} hostnames...", fg="#333")
+    results = queue.Queue()
+    stop = batch_stop = threading.Event()
+    update_busy()
+
+    def worker():
+        for result in resolve_many(hostnames, stop_event=stop, cache=dns_cache):
+            results.put(result)
+        results.put(None)
+
+    def drain(resolved=0, failed=0):
+        global batch_stop
+
+        # Runs on the Tk thread: move whatever the worker has finished into the list
+        try:
+            while True:
+                result = results.get_nowait()
+                if result is None:
+                    summary = f"Resolved {resolved}, failed {failed}."
+                    if stop.is_set():
+                        summary = f"Cancelled. {summary}"
+                    result_label.config(text=summary, fg="green" if not failed else "#333")
+                    batch_button.config(state=tk.NORMAL)
+                    batch_stop = None
+                    cache_label.config(text=dns_cache.stats())
+                    update_busy()
+                    return
+                hostname, ip_address, error = result
+                if error:
+                    failed += 1
+                    batch_list.insert(tk.END, f"{hostname}: {error}")
+                    batch_list.itemconfig(tk.END, fg="red")
+                else:
+                    resolved += 1
+                    batch_list.insert(tk.END, f"{hostname}: {ip_address}")
+        except queue.Empty:
+            pass
+        root.after(100, drain, resolved, failed)
+
+    threading.Thread(target=worker, daemon=True).start()
+    drain()
+
 
-# Main Window
-root = tk.Tk()
-root.title("IP Finder")
-root.geometry("500x300")
-root.resizable(False, False)
-root.configure(bg="#e8f0f2")
-
-# Header Frame
-header_frame = tk.Frame(root, bg="#007BFF")
-header_frame.pack(fill="x")
-header_label = tk.Label(header_frame, text="IP Address Finder", font=("Arial", 20, "bold"), bg="#007BFF", fg="white")
-header_label.pack(pady=10)
-
-# Content Frame
-content_frame = tk.Frame(root, bg="#e8f0f2")
-content_frame.pack(pady=20)
-
-# URL Entry Label
-url_label = tk.Label(content_frame, text="Enter URL:", font=("Arial", 14), bg="#e8f0f2", fg="#333")
-url_label.grid(row=0, column=0, pady=10, padx=10, sticky="w")
-
-# URL Entry Field
-url_entry = tk.Entry(content_frame, font=("Arial", 14), width=30, bd=2, relief="solid")
-url_entry.grid(row=0, column=1, pady=10, padx=10)
-
-# Find Button
-find_button = tk.Button(content_frame, text="Find IP", font=("Arial", 14, "bold"), bg="#28a745", fg="white", bd=0, padx=15, pady=5, relief="flat", command=get_ip)
-find_button.grid(row=1, columnspan=2, pady=20)
-
-# Result Label
-result_label = tk.Label(content_frame, text="", font=("Arial", 14), bg="#e8f0f2")
-result_label.grid(row=2, columnspan=2, pady=10)
-
-# Footer Frame
-footer_frame = tk.Frame(root, bg="#007BFF")
-footer_frame.pack(fill="x", side="bottom")
-footer_label = tk.Label(footer_frame, text="Powered by Tkinter", font=("Arial", 10, "italic"), bg="#007BFF", fg="white")
-footer_label.pack(pady=5)
-
-root.mainloop()
+def build_gui():
+    global root, url_entry, result_label, batch_button, batch_list, progress_bar, cancel_button, cache_label
+
+    # Main Window
+    root = tk.Tk()
+    root.title("IP Finder")
+    root.geometry("500x580")
+    root.resizable(False, False)
+    root.configure(bg="#e8f0f2")
+
+    # Header Frame
+    header_frame = tk.Frame(root, bg="#007BFF")
+    header_frame.pack(fill="x")
+    header_label = tk.Label(header_frame, text="IP Address Finder", font=("Arial", 20, "bold"), bg="#007BFF", fg="white")
+    header_label.pack(pady=10)
+
+    # Content Frame
+    content_frame = tk.Frame(root, bg="#e8f0f2")
+    content_frame.pack(pady=20)
+
+    # URL Entry Label
+    url_label = tk.Label(content_frame, text="Enter URL:", font=("Arial", 14), bg="#e8f0f2", fg="#333")
+    url_label.grid(row=0, column=0, pady=10, padx=10, sticky="w")
+
+    # URL Entry Field
+    url_entry = tk.Entry(content_frame, font=("Arial", 14), width=30, bd=2, relief="solid")
+    url_entry.grid(row=0, column=1, pady=10, padx=10)
+
+    # Find Button
+    find_button = tk.Button(content_frame, text="Find IP", font=("Arial", 14, "bold"), bg="#28a745", fg="white", bd=0, padx=15, pady=5, relief="flat", command=get_ip)
+    find_button.grid(row=1, column=0, pady=20)
+
+    # Batch Button
+    batch_button = tk.Button(content_frame, text="Resolve File...", font=("Arial", 14, "bold"), bg="#007BFF", fg="white", bd=0, padx=15, pady=5, relief="flat", command=resolve_file)
+    batch_button.grid(row=1, column=1, pady=20)
+
+    # Progress Bar and Cancel Button, active while lookups are running
+    progress_bar = ttk.Progressbar(content_frame, mode="indeterminate", length=250)
+    progress_bar.grid(row=2, column=0, padx=10)
+    cancel_button = tk.Button(content_frame, text="Cancel", font=("Arial", 12), bg="#dc3545", fg="white", bd=0, padx=10, relief="flat", command=cancel_lookups, state=tk.DISABLED)
+    cancel_button.grid(row=2, column=1)
+
+    # Result Label
+    result_label = tk.Label(content_frame, text="", font=("Arial", 14), bg="#e8f0f2")
+    result_label.grid(row=3, columnspan=2, pady=10)
+
+    # Batch Results List
+    list_frame = tk.Frame(content_frame, bg="#e8f0f2")
+    list_frame.grid(row=4, columnspan=2, padx=10)
+    batch_list = tk.Listbox(list_frame, font=("Arial", 11), width=50, height=8)
+    batch_scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=batch_list.yview)
+    batch_list.configure(yscrollcommand=batch_scrollbar.set)
+    batch_scrollbar.pack(side="right", fill="y")
+    batch_list.pack(side="left")
+
+    # Cache Hit/Miss Counters
+    cache_label = tk.Label(content_frame, text=dns_cache.stats(), font=("Arial", 10), bg="#e8f0f2", fg="#555")
+    cache_label.grid(row=5, columnspan=2, pady=5)
+
+    # Footer Frame
+    footer_frame = tk.Frame(root, bg="#007BFF")
+    footer_frame.pack(fill="x", side="bottom")
+    footer_label = tk.Label(footer_frame, text="Powered by Tkinter", font=("Arial", 10, "italic"), bg="#007BFF", fg="white")
+    footer_label.pack(pady=5)
+
+    return root
+
+
+def run_batch(args):
+    """CLI batch mode: print hostname,ip (or hostname,,error) lines as lookups finish."""
+    hostnames = read_hostnames(args.batch)
+    start = time.monotonic()
+    resolved = failed = 0
+    for hostname, ip_address, error in resolve_many(hostnames, args.workers, args.timeout, cache=dns_cache):
+        if error:
+            failed += 1
+            print(f"{hostname},,{error}", flush=True)
+        else:
+            resolved += 1
+            print(f"{hostname},{ip_address}", flush=True)
+    print(f"Resolved {resolved}, failed {failed} in {time.monotonic() - start:.2f}s. {dns_cache.stats()}.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Find the IP address of a hostname. Starts the GUI unless --batch is given.")
+    parser.add_argument("--batch", metavar="FILE", help="resolve every hostname in FILE (one per line, '-' for stdin) and print CSV")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help=f"concurrent lookups in batch mode (default: {BATCH_WORKERS})")
+    parser.add_argument("--timeout", type=float, default=LOOKUP_TIMEOUT, help=f"seconds before a lookup is reported as timed out (default: {LOOKUP_TIMEOUT})")
+    parser.add_argument("--hosts-file", metavar="FILE", help="answer lookups from an /etc/hosts style FILE instead of DNS")
+    parser.add_argument("--cache", metavar="FILE", help="keep the lookup cache in a SQLite FILE so later runs start warm")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help=f"most hostnames to keep cached (default: {CACHE_SIZE})")
+    parser.add_argument("--ttl", type=float, default=CACHE_TTL, help=f"seconds to cache an answer (default: {CACHE_TTL:g})")
+    parser.add_argument("--negative-ttl", type=float, default=CACHE_NEGATIVE_TTL,
+                        help=f"seconds to cache a failed lookup (default: {CACHE_NEGATIVE_TTL:g})")
+    args = parser.parse_args(argv)
+    if args.workers <= 0 or args.timeout <= 0 or args.cache_size <= 0:
+        parser.error("--workers, --timeout and --cache-size must be positive")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    resolver = hosts_file_resolver(args.hosts_file) if args.hosts_file else socket.gethostbyname
+    dns_cache = DNSCache(resolver, args.cache_size, args.ttl, args.negative_ttl, args.cache)
+    try:
+        if args.batch:
+            sys.exit(run_batch(args))
+        build_gui().mainloop()
+    finally:
+        dns_cache.close()
@@ -2,16 +2,11 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-import seaborn as sns
+from ml_engine import BackgroundRunner, default_models, fit_models, prepare_data
+from ml_plots import VISUALIZATIONS, aggregate, render
 
 class MLGuiApp:
-    def __init__(self, root):
+    def __init__(self, root, n_jobs=None):
         self.root = root
         self.root.title("Machine Learning Model Comparison")
         self.root.geometry("800x600")
@@ -19,7 +14,11 @@ class MLGuiApp:
 
         # Variables
         self.file_path = None
+        self.n_jobs = n_jobs  # Worker budget for model comparison, None uses every core
+        self.runner = BackgroundRunner(root)  # Runs the comparison off the Tk main loop
         self.data = None
+        self.plot_cache = None  # Aggregates behind every visualization of the current data
+        self.prepared = None  # (data, PreparedData) of the split used for model comparison
 
         # Fonts and Colors
         self.font = ('Roboto', 12)
@@ -91,63 +90,70 @@ class MLGuiApp:
             else:
                 self.data = pd.read_excel(file_path)
             self.file_path = file_path
+            self.plot_cache = None
+            self.release_prepared()
             messagebox.showinfo("Success", "File uploaded successfully!")
             self.visualize_button.config(state=tk.NORMAL)
             self.compare_button.config(state=tk.NORMAL)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to upload file: {str(e)}")
 
+    def prepared_data(self, data):
+        # Split and preprocessed once per loaded dataset, then reused by every comparison.
+        # Jobs run one at a time, so this is never built twice at once.
+        prepared = self.prepared
+        if prepared is None or prepared[0] is not data:
+            if prepared is not None:
+                prepared[1].close()
+            prepared = self.prepared = (data, prepare_data(data))
+        return prepared[1]
+
+    def release_prepared(self):
+        # Closed as a job, so a comparison still running on the old split finishes first
+        if self.prepared is not None:
+            prepared = self.prepared[1]
+            self.prepared = None
+            self.runner.submit(lambda job: prepared.close())
+
     def visualize_data(self):
         if self.data is None:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
 
-        try:
-            numeric_cols = self.data.select_dtypes(include=['number']).columns
+        numeric_cols = self.data.select_dtypes(include=['number']).columns
+        if len(numeric_cols) == 0:
+            messagebox.showwarning("No Numeric Data", "No numeric columns available for visualization.")
+            return
 
-            if len(numeric_cols) == 0:
-                messagebox.showwarning("No Numeric Data", "No numeric columns available for visualization.")
-                return
+        if self.plot_cache is not None:
+            self.show_plots(self.plot_cache)
+            return
 
-            # Correlation Heatmap
-            plt.figure(figsize=(10, 6))
-            sns.heatmap(self.data[numeric_cols].corr(), annot=True, cmap="coolwarm")
-            plt.title("Correlation Heatmap")
-            plt.show()
+        data = self.data
+
+        def work(job):
+            # Every plot is reduced to small aggregates off the Tk main loop
+            return {visualization: aggregate(data, visualization) for visualization in VISUALIZATIONS}
+
+        def done(prepared):
+            self.visualize_button.config(state=tk.NORMAL, text="Visualize Data")
+            if self.data is data:
+                self.plot_cache = prepared
+            self.show_plots(prepared)
+
+        def failed(e):
+            self.visualize_button.config(state=tk.NORMAL, text="Visualize Data")
+            messagebox.showerror("Error", f"Failed to visualize data: {str(e)}")
 
-            # Bar Plot
-            for col in numeric_cols[:1]:  # Visualize the first numeric column
-                plt.figure(figsize=(8, 6))
-                self.data[col].value_counts().head(10).plot(kind='bar', color='skyblue', title=f"Bar Graph for {col}")
-                plt.xlabel(col)
-                plt.ylabel("Count")
-                plt.show()
-
-            # Scatter Plot
-            if len(numeric_cols) > 1:
-                plt.figure(figsize=(8, 6))
-                sns.scatterplot(data=self.data, x=numeric_cols[0], y=numeric_cols[1])
-                plt.title(f"Scatter Plot: {numeric_cols[0]} vs {numeric_cols[1]}")
-                plt.xlabel(numeric_cols[0])
-                plt.ylabel(numeric_cols[1])
-                plt.show()
-
-            # Histogram
-            for col in numeric_cols:
-                plt.figure(figsize=(8, 6))
-                self.data[col].plot(kind='hist', bins=20, color='orange', title=f"Histogram for {col}")
-                plt.xlabel(col)
-                plt.ylabel("Frequency")
-                plt.show()
-
-            # Pie Charts
-            categorical_cols = self.data.select_dtypes(include=['object', 'category']).columns
-            for col in categorical_cols[:1]:  # Limit to the first categorical column for clarity
-                plt.figure(figsize=(8, 6))
-                self.data[col].value_counts().plot(kind='pie', autopct='%1.1f%%', title=f"Pie Chart for {col}")
-                plt.ylabel('')  # Hide the y-label for better aesthetics
-                plt.show()
+        self.visualize_button.config(state=tk.DISABLED, text="Preparing plots...")
+        self.runner.submit(work, on_done=done, on_error=failed)
 
+    def show_plots(self, prepared):
+        try:
+            # All the figures open together, histograms in one grid, instead of one blocking window at a time
+            for visualization, aggregates in prepared.items():
+                render(visualization, aggregates)
+            plt.show()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to visualize data: {str(e)}")
 
@@ -156,38 +162,35 @@ class MLGuiApp:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
 
-        try:
-            # Assume last column is the target
-            X = self.data.iloc[:, :-1]
-            y = self.data.iloc[:, -1]
-
-            if not pd.api.types.is_numeric_dtype(y):
-                y = pd.factorize(y)[0]
+        data = self.data
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+        def work(job):
+            # Assume last column is the target; features are imputed, encoded and scaled once for every model
+            prepared = self.prepared_data(data)
 
             # Models to compare
-            models = {
-                'Random Forest': RandomForestClassifier(),
-                'Logistic Regression': LogisticRegression(max_iter=1000),
-                'SVM': SVC(),
-                'Decision Tree': DecisionTreeClassifier()
-            }
-
-            results = {}
-            for model_name, model in models.items():
-                model.fit(X_train, y_train)
-                predictions = model.predict(X_test)
-                accuracy = accuracy_score(y_test, predictions)
-                results[model_name] = accuracy
+            models = default_models()
+
+            # Fit the models concurrently, each in its own worker process
+            return {model_name: (accuracy, getattr(model, "strategy_", None)) for model_name, (model, accuracy)
+                    in fit_models(models, *prepared.split(), self.n_jobs, job=job, scaled=prepared.scaled()).items()}
+
+        def done(results):
+            self.compare_button.config(state=tk.NORMAL, text="Compare ML Models")
 
             # Display results
-            results_str = "\n".join([f"{name}: {accuracy:.2f}" for name, accuracy in results.items()])
+            # An SVM fitted as an approximation on a large dataset is named as such
+            results_str = "\n".join([f"{name}: {accuracy:.2f}" + (f" ({strategy})" if strategy else "")
+                                     for name, (accuracy, strategy) in results.items()])
             messagebox.showinfo("Model Comparison Results", results_str)
 
-        except Exception as e:
+        def failed(e):
+            self.compare_button.config(state=tk.NORMAL, text="Compare ML Models")
             messagebox.showerror("Error", f"Failed to compare models: {str(e)}")
 
+        self.compare_button.config(state=tk.DISABLED, text="Comparing models...")
+        self.runner.submit(work, on_done=done, on_error=failed)
+
 if __name__ == "__main__":
     root = tk.Tk()
     app = MLGuiApp(root)
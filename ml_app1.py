@@ -2,16 +2,11 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-import seaborn as sns
+from ml_engine import BackgroundRunner, default_models, fit_models, prepare_data
+from ml_plots import VISUALIZATIONS, aggregate, render
 
 class MLGuiApp:
-    def __init__(self, root):
+    def __init__(self, root, n_jobs=None):
         self.root = root
         self.root.title("Machine Learning Model Comparison")
         self.root.geometry("900x700")
@@ -19,16 +14,15 @@ class MLGuiApp:
 
         # Variables
         self.file_path = None
+        self.n_jobs = n_jobs  # Worker budget for model comparison, None uses every core
+        self.runner = BackgroundRunner(root)  # Runs the comparison off the Tk main loop
         self.data = None
         self.selected_visualization = tk.StringVar()
+        self.plot_cache = {}  # Aggregates behind each visualization of the current data
+        self.prepared = None  # (data, PreparedData) of the split used for model comparison
 
         # Models dictionary
-        self.models = {
-            'Random Forest': RandomForestClassifier(),
-            'Logistic Regression': LogisticRegression(max_iter=1000),
-            'SVM': SVC(),
-            'Decision Tree': DecisionTreeClassifier()
-        }
+        self.models = default_models()
         self.results = {}
 
         # Title label
@@ -47,7 +41,7 @@ class MLGuiApp:
         visualization_label = tk.Label(control_frame, text="Select Visualization:", font=('Roboto', 12), bg="#E8EAF6")
         visualization_label.grid(row=1, column=0, padx=10, pady=10, sticky="w")
         self.visualization_dropdown = ttk.Combobox(control_frame, textvariable=self.selected_visualization, state="readonly", width=22)
-        self.visualization_dropdown['values'] = ["Correlation Heatmap", "Bar Plot", "Scatter Plot", "Histogram", "Pie Chart"]
+        self.visualization_dropdown['values'] = VISUALIZATIONS
         self.visualization_dropdown.grid(row=1, column=1, padx=10, pady=10)
 
         # Visualize button
@@ -82,59 +76,61 @@ class MLGuiApp:
             else:
                 self.data = pd.read_excel(file_path)
             self.file_path = file_path
+            self.plot_cache = {}
+            self.release_prepared()
             messagebox.showinfo("Success", "File uploaded successfully!")
             self.visualize_button.config(state=tk.NORMAL)
             self.compare_button.config(state=tk.NORMAL)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to upload file: {str(e)}")
 
+    def prepared_data(self, data):
+        # Split and preprocessed once per loaded dataset, then reused by every comparison.
+        # Jobs run one at a time, so this is never built twice at once.
+        prepared = self.prepared
+        if prepared is None or prepared[0] is not data:
+            if prepared is not None:
+                prepared[1].close()
+            prepared = self.prepared = (data, prepare_data(data))
+        return prepared[1]
+
+    def release_prepared(self):
+        # Closed as a job, so a comparison still running on the old split finishes first
+        if self.prepared is not None:
+            prepared = self.prepared[1]
+            self.prepared = None
+            self.runner.submit(lambda job: prepared.close())
+
     def visualize_data(self):
         if self.data is None:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
 
-        try:
-            visualization = self.selected_visualization.get()
-            numeric_cols = self.data.select_dtypes(include=['number']).columns
-
-            if visualization == "Correlation Heatmap":
-                plt.figure(figsize=(10, 6))
-                sns.heatmap(self.data[numeric_cols].corr(), annot=True, cmap="coolwarm")
-                plt.title("Correlation Heatmap")
-                plt.show()
-
-            elif visualization == "Bar Plot":
-                for col in numeric_cols[:1]:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].value_counts().head(10).plot(kind='bar', color='skyblue', title=f"Bar Graph for {col}")
-                    plt.xlabel(col)
-                    plt.ylabel("Count")
-                    plt.show()
-
-            elif visualization == "Scatter Plot" and len(numeric_cols) > 1:
-                plt.figure(figsize=(8, 6))
-                sns.scatterplot(data=self.data, x=numeric_cols[0], y=numeric_cols[1])
-                plt.title(f"Scatter Plot: {numeric_cols[0]} vs {numeric_cols[1]}")
-                plt.xlabel(numeric_cols[0])
-                plt.ylabel(numeric_cols[1])
-                plt.show()
-
-            elif visualization == "Histogram":
-                for col in numeric_cols:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].plot(kind='hist', bins=20, color='orange', title=f"Histogram for {col}")
-                    plt.xlabel(col)
-                    plt.ylabel("Frequency")
-                    plt.show()
-
-            elif visualization == "Pie Chart":
-                categorical_cols = self.data.select_dtypes(include=['object', 'category']).columns
-                for col in categorical_cols[:1]:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].value_counts().plot(kind='pie', autopct='%1.1f%%', title=f"Pie Chart for {col}")
-                    plt.ylabel('')
-                    plt.show()
+        visualization = self.selected_visualization.get()
+        if visualization in self.plot_cache:
+            self.show_plot(visualization, self.plot_cache[visualization])
+            return
+
+        data = self.data
+
+        def done(prepared):
+            self.visualize_button.config(state=tk.NORMAL, text="Visualize Data")
+            if self.data is data:
+                self.plot_cache[visualization] = prepared
+            self.show_plot(visualization, prepared)
+
+        def failed(e):
+            self.visualize_button.config(state=tk.NORMAL, text="Visualize Data")
+            messagebox.showerror("Error", f"Failed to visualize data: {str(e)}")
+
+        # The plot is reduced to small aggregates off the Tk main loop
+        self.visualize_button.config(state=tk.DISABLED, text="Preparing plot...")
+        self.runner.submit(lambda job: aggregate(data, visualization), on_done=done, on_error=failed)
 
+    def show_plot(self, visualization, prepared):
+        try:
+            render(visualization, prepared)
+            plt.show()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to visualize data: {str(e)}")
 
@@ -143,31 +139,41 @@ class MLGuiApp:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
 
-        try:
-            X = self.data.iloc[:, :-1]
-            y = self.data.iloc[:, -1]
+        data = self.data
+        models = dict(self.models)
 
-            if not pd.api.types.is_numeric_dtype(y):
-                y = pd.factorize(y)[0]
+        def work(job):
+            # Features are imputed, encoded and scaled once, then shared by every model
+            prepared = self.prepared_data(data)
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+            # Fit the models concurrently, each in its own worker process
+            return fit_models(models, *prepared.split(), self.n_jobs, job=job, scaled=prepared.scaled())
 
-            for model_name, model in self.models.items():
-                model.fit(X_train, y_train)
-                predictions = model.predict(X_test)
-                self.results[model_name] = accuracy_score(y_test, predictions)
+        def done(fitted):
+            self.compare_button.config(state=tk.NORMAL, text="Compare ML Models")
+            for model_name, (model, accuracy) in fitted.items():
+                self.models[model_name] = model
+                self.results[model_name] = accuracy
 
             messagebox.showinfo("Model Comparison", "Model accuracies calculated. Use the buttons to check individual accuracies.")
             for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button]:
                 button.config(state=tk.NORMAL)
 
-        except Exception as e:
+        def failed(e):
+            self.compare_button.config(state=tk.NORMAL, text="Compare ML Models")
             messagebox.showerror("Error", f"Failed to compare models: {str(e)}")
 
+        self.compare_button.config(state=tk.DISABLED, text="Comparing models...")
+        self.runner.submit(work, on_done=done, on_error=failed)
+
     def show_model_accuracy(self, model_name):
         if model_name in self.results:
             accuracy = self.results[model_name]
-            messagebox.showinfo(f"{model_name} Accuracy", f"Accuracy: {accuracy:.2f}")
+            message = f"Accuracy: {accuracy:.2f}"
+            strategy = getattr(self.models[model_name], "strategy_", None)
+            if strategy:
+                message += f"\nFitted as {strategy} because of the dataset size"
+            messagebox.showinfo(f"{model_name} Accuracy", message)
         else:
             messagebox.showwarning("No Results", f"No accuracy available for {model_name}. Please compare models first.")
 
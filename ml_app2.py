@@ -1,36 +1,59 @@
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
 import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, ConfusionMatrixDisplay
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-import seaborn as sns
+from ml_engine import (CV_FOLDS, FIT_CACHE_BYTES, MODEL_STORE_BYTES, MODEL_STORE_DIR, PROFILE_STAGES, SEARCH_BUDGET,
+                       SEARCH_TIME_LIMIT, BackgroundRunner, FitCache, ModelStore, cross_validate_models,
+                       default_models, export_pipeline, file_key, fit_models, fit_streaming, iter_chunks, load_dataset, measure,
+                       model_key, prepare_data, score_file, search_models, write_trace)
+from ml_plots import VISUALIZATIONS, aggregate, render, reservoir_sample
 
 
 class MLGuiApp:
-    def __init__(self, root):
+    def __init__(self, root, n_jobs=None, fit_cache_bytes=FIT_CACHE_BYTES, model_store_dir=MODEL_STORE_DIR,
+                 model_store_bytes=MODEL_STORE_BYTES, memory_map=False, search_budget=SEARCH_BUDGET,
+                 search_time_limit=SEARCH_TIME_LIMIT):
         self.root = root
         self.root.title("Machine Learning Model Comparison")
-        self.root.geometry("900x700")
+        self.root.geometry("1100x900")
         self.root.config(bg="#F0F0F0")
 
         # Variables
         self.file_path = None
+        self.n_jobs = n_jobs  # Worker budget for model comparison, None uses every core
         self.data = None
+        self.memory_map = memory_map  # Memory-map Parquet/Feather files instead of reading them into RAM
         self.selected_visualization = tk.StringVar()
+        self.plot_cache = {}  # Aggregates behind each visualization of the current data
+        self.streaming = tk.BooleanVar()  # Train partial_fit models over the file in chunks instead of loading it
+        self.streaming_file = None  # Set when the uploaded file is streamed; self.data is then only a preview
+        self.streaming_models = {}
 
         # Models dictionary
-        self.models = {
-            'Random Forest': RandomForestClassifier(),
-            'Logistic Regression': LogisticRegression(max_iter=1000),
-            'SVM': SVC(),
-            'Decision Tree': DecisionTreeClassifier()
-        }
+        self.models = default_models()
         self.results = {}
+        self.cross_validate = tk.BooleanVar()  # Compare with k-fold cross-validation instead of one split
+        self.cv_results = {}
+        self.search_method = tk.StringVar(value="Randomized")
+        self.search_budget = search_budget  # Trials shared by all models per search
+        self.search_time_limit = search_time_limit  # Seconds before a search stops its trials
+        self.search_results = {}
+        self.strategies = {}  # How models that adapt to the data size were fitted, e.g. an approximate SVM
+
+        # Fitted models and test predictions, kept in memory and on disk across sessions
+        self.model_store = ModelStore(model_store_dir, model_store_bytes)
+        self.fit_cache = FitCache(fit_cache_bytes, self.model_store)
+        self.data_key = None
+        self.prepared = None  # (data_key, PreparedData) of the last split used for training
+
+        # Per-stage wall time, CPU time and peak RSS: every Timing this session for the trace export,
+        # and the latest per (stage, name) of the current data for the results table
+        self.timings = []
+        self.stage_timings = {}
+        self.profile_stage = tk.StringVar(value="None")  # Stage to run under cProfile
+        self.pipeline_path = None  # Last model exported for scoring
 
         # Title label
         self.title_label = tk.Label(root, text="Machine Learning Model Comparison", font=('Roboto', 18, 'bold'), bg="#E8EAF6", fg="#333", pady=20)
@@ -41,14 +64,14 @@ class MLGuiApp:
         control_frame.pack(pady=20)
 
         # Upload button
-        self.upload_button = tk.Button(control_frame, text="Upload CSV/Excel File", command=self.upload_file, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=25, relief="flat")
+        self.upload_button = tk.Button(control_frame, text="Upload Data File", command=self.upload_file, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=25, relief="flat")
         self.upload_button.grid(row=0, column=0, padx=20, pady=10)
 
         # Visualization dropdown
         visualization_label = tk.Label(control_frame, text="Select Visualization:", font=('Roboto', 12), bg="#E8EAF6")
         visualization_label.grid(row=1, column=0, padx=10, pady=10, sticky="w")
         self.visualization_dropdown = ttk.Combobox(control_frame, textvariable=self.selected_visualization, state="readonly", width=22)
-        self.visualization_dropdown['values'] = ["Correlation Heatmap", "Bar Plot", "Scatter Plot", "Histogram", "Pie Chart"]
+        self.visualization_dropdown['values'] = VISUALIZATIONS
         self.visualization_dropdown.grid(row=1, column=1, padx=10, pady=10)
 
         # Visualize button
@@ -59,6 +82,44 @@ class MLGuiApp:
         self.compare_button = tk.Button(control_frame, text="Compare ML Models", command=self.compare_models, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=25, relief="flat", state=tk.DISABLED)
         self.compare_button.grid(row=3, column=0, columnspan=2, pady=10)
 
+        # Clear model cache button
+        self.clear_cache_button = tk.Button(control_frame, text="Clear Model Cache", command=self.clear_model_cache, font=('Roboto', 10), bg="#9FA8DA", fg="white", width=25, relief="flat")
+        self.clear_cache_button.grid(row=4, column=0, columnspan=2, pady=5)
+
+        # Streaming mode for files too large to load
+        self.streaming_check = tk.Checkbutton(control_frame, text="Streaming mode (for files larger than memory)", variable=self.streaming, font=('Roboto', 10), bg="#E8EAF6")
+        self.streaming_check.grid(row=5, column=0, columnspan=2, pady=5)
+
+        # Cross-validated comparison
+        self.cv_check = tk.Checkbutton(control_frame, text=f"Cross-validate ({CV_FOLDS} folds, losing models pruned early)", variable=self.cross_validate, font=('Roboto', 10), bg="#E8EAF6")
+        self.cv_check.grid(row=6, column=0, columnspan=2, pady=5)
+
+        # Hyperparameter search
+        search_label = tk.Label(control_frame, text="Search Method:", font=('Roboto', 12), bg="#E8EAF6")
+        search_label.grid(row=7, column=0, padx=10, pady=10, sticky="w")
+        self.search_dropdown = ttk.Combobox(control_frame, textvariable=self.search_method, state="readonly", width=22)
+        self.search_dropdown['values'] = ["Randomized", "Halving"]
+        self.search_dropdown.grid(row=7, column=1, padx=10, pady=10)
+
+        self.tune_button = tk.Button(control_frame, text="Tune Hyperparameters", command=self.tune_models, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=25, relief="flat", state=tk.DISABLED)
+        self.tune_button.grid(row=8, column=0, columnspan=2, pady=10)
+
+        # Profiling
+        profile_label = tk.Label(control_frame, text="Profile Stage:", font=('Roboto', 12), bg="#E8EAF6")
+        profile_label.grid(row=9, column=0, padx=10, pady=10, sticky="w")
+        self.profile_dropdown = ttk.Combobox(control_frame, textvariable=self.profile_stage, state="readonly", width=22)
+        self.profile_dropdown['values'] = ["None", *PROFILE_STAGES]
+        self.profile_dropdown.grid(row=9, column=1, padx=10, pady=10)
+
+        self.trace_button = tk.Button(control_frame, text="Export Timing Trace", command=self.export_trace, font=('Roboto', 10), bg="#9FA8DA", fg="white", width=25, relief="flat")
+        self.trace_button.grid(row=10, column=0, columnspan=2, pady=5)
+
+        # Export the best model and score new data with it
+        self.export_button = tk.Button(control_frame, text="Export Best Model", command=self.export_best_model, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=20, relief="flat", state=tk.DISABLED)
+        self.export_button.grid(row=11, column=0, padx=5, pady=10)
+        self.score_button = tk.Button(control_frame, text="Score File", command=self.score_data_file, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=20, relief="flat")
+        self.score_button.grid(row=11, column=1, padx=5, pady=10)
+
         # Buttons for individual model accuracy
         button_frame = tk.Frame(root, bg="#E8EAF6")
         button_frame.pack(pady=20)
@@ -72,74 +133,207 @@ class MLGuiApp:
         self.table_frame = tk.Frame(root, bg="#E8EAF6")
         self.table_frame.pack(pady=20)
 
+        # Status bar for background jobs
+        status_frame = tk.Frame(root, bg="#E8EAF6")
+        status_frame.pack(fill="x", side="bottom")
+        self.status_label = tk.Label(status_frame, text="Ready", font=('Roboto', 10), bg="#E8EAF6", anchor="w")
+        self.status_label.pack(side="left", padx=10, pady=5)
+        self.cancel_button = tk.Button(status_frame, text="Cancel", command=self.cancel_jobs, font=('Roboto', 10, 'bold'), bg="#d32f2f", fg="white", relief="flat", state=tk.DISABLED)
+        self.cancel_button.pack(side="right", padx=10, pady=5)
+        self.progress_bar = ttk.Progressbar(status_frame, length=200)
+        self.progress_bar.pack(side="right", padx=10, pady=5)
+
+        # Training, evaluation and plot preparation run here, off the Tk main loop
+        self.runner = BackgroundRunner(root)
+        self.active_jobs = 0
+
     def create_model_button(self, parent, text, model_name):
         button = tk.Button(parent, text=text, font=('Roboto', 12, 'bold'), bg="#5C6BC0", fg="white", width=30, relief="flat", command=lambda: self.show_model_accuracy(model_name), state=tk.DISABLED)
         button.pack(pady=5)
         return button
 
+    def start_job(self, message, work, on_done, error_message, steps=None, on_progress=None, data_key=None):
+        # Run work(job) in the background; on_done(result) is called back on the Tk thread.
+        # With data_key, results are dropped if another file was uploaded in the meantime.
+        self.active_jobs += 1
+        self.status_label.config(text=message)
+        self.cancel_button.config(state=tk.NORMAL)
+        if steps:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", maximum=steps, value=0)
+        else:
+            self.progress_bar.config(mode="indeterminate")
+            self.progress_bar.start(10)
+
+        def done(result):
+            if data_key is not None and data_key != self.data_key:
+                self.finish_job("Discarded results for the previous file")
+                return
+            self.finish_job("Ready")
+            on_done(result)
+
+        def failed(e):
+            self.finish_job("Ready")
+            messagebox.showerror("Error", f"{error_message}: {str(e)}")
+
+        return self.runner.submit(work, on_done=done, on_error=failed, on_progress=on_progress or self.show_progress,
+                                  on_cancel=lambda: self.finish_job("Cancelled"))
+
+    def finish_job(self, message):
+        self.active_jobs -= 1
+        if self.active_jobs == 0:
+            self.status_label.config(text=message)
+            self.progress_bar.stop()
+            self.progress_bar.config(mode="determinate", value=0)
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def show_progress(self, model_name, accuracy, done, total):
+        self.status_label.config(text=f"{model_name} finished ({done}/{total} models)")
+        self.progress_bar.config(value=done)
+
+    def show_cv_progress(self, label, accuracy, done, total):
+        self.status_label.config(text=f"{label} finished ({done}/{total} folds)")
+        self.progress_bar.config(maximum=total, value=done)
+
+    def show_search_progress(self, label, score, done, total):
+        self.status_label.config(text=f"{label}: {score * 100:.1f}% ({done}/{total})")
+        self.progress_bar.config(maximum=total, value=done)
+
+    def show_stream_progress(self, stage, chunks, rows):
+        self.status_label.config(text=f"{stage}: chunk {chunks}, {rows:,} rows")
+
+    def profiled_stage(self):
+        stage = self.profile_stage.get()
+        return None if stage == "None" else stage
+
+    def record_timings(self, timings):
+        # Called on the Tk thread with the Timings of a finished job
+        self.timings.extend(timings)
+        for timing in timings:
+            self.stage_timings[(timing.stage, timing.name)] = timing
+        profiles = [timing.profile for timing in timings if timing.profile]
+        if profiles:
+            messagebox.showinfo("Profile", "cProfile output saved (open with python -m pstats or snakeviz):\n\n" + "\n".join(profiles))
+
+    def export_trace(self):
+        if not self.timings:
+            messagebox.showinfo("Timing Trace", "Nothing has been timed yet.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            write_trace(self.timings, path)
+            messagebox.showinfo("Timing Trace", f"{len(self.timings)} stage(s) saved to {path}.\nOpen it in chrome://tracing or ui.perfetto.dev.")
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export trace: {str(e)}")
+
+    def show_score_progress(self, rows):
+        self.status_label.config(text=f"Scoring: {rows:,} rows written")
+
+    def cancel_jobs(self):
+        self.runner.cancel_all()
+
+    def clear_model_cache(self):
+        entries = self.model_store.entries()
+        size_mb = sum(entry["bytes"] for entry in entries) / (1024 * 1024)
+        if not entries:
+            messagebox.showinfo("Model Cache", "The model cache is empty.")
+            return
+        if messagebox.askyesno("Model Cache", f"Delete {len(entries)} cached model(s) ({size_mb:.1f} MB) from {self.model_store.directory}?"):
+            self.model_store.purge()
+            self.fit_cache.clear()
+
     def upload_file(self):
-        file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx")])
+        file_path = filedialog.askopenfilename(filetypes=[("Data files", "*.csv *.xlsx *.parquet *.feather"),
+                                                          ("CSV files", "*.csv"), ("Excel files", "*.xlsx"),
+                                                          ("Parquet files", "*.parquet"), ("Feather files", "*.feather")])
         if not file_path:
             return
-        try:
-            if file_path.endswith(".csv"):
-                self.data = pd.read_csv(file_path)
-            else:
-                self.data = pd.read_excel(file_path)
+        streaming = self.streaming.get()
+        profile_stage = self.profiled_stage()
+
+        def work(job):
+            timings = []
+            with measure(timings, "load", os.path.basename(file_path), profile_stage):
+                if streaming:
+                    # Only a random sample is kept, as a preview for the visualizations
+                    data, report = reservoir_sample(iter_chunks(file_path)), None
+                else:
+                    # CSVs are read in chunks and every file is shrunk to compact dtypes as it loads
+                    data, report = load_dataset(file_path, memory_map=self.memory_map, job=job)
+            return data, report, file_key(file_path, data), timings
+
+        def done(loaded):
+            data, report, data_key, timings = loaded
+            self.data = data
             self.file_path = file_path
-            messagebox.showinfo("Success", "File uploaded successfully!")
+            self.streaming_file = file_path if streaming else None
+            self.fit_cache.clear()
+            self.plot_cache = {}
+            self.data_key = data_key
+            # Results from the previous file no longer apply
+            self.results = {}
+            self.cv_results = {}
+            self.search_results = {}
+            self.strategies = {}
+            self.streaming_models = {}
+            self.stage_timings = {}
+            self.record_timings(timings)
+            self.display_results_table()
+            if streaming:
+                messagebox.showinfo("Success", f"File opened in streaming mode.\n\n"
+                                               f"Visualizations use a random sample of {len(data):,} rows; "
+                                               f"models are trained over the whole file in chunks.")
+            else:
+                raw_mb = report["raw_bytes"] / (1024 * 1024)
+                loaded_mb = report["bytes"] / (1024 * 1024)
+                messagebox.showinfo("Success", f"File uploaded successfully!\n\n"
+                                               f"{len(data):,} rows loaded in {report['seconds']:.1f} s\n"
+                                               f"Memory: {raw_mb:.1f} MB -> {loaded_mb:.1f} MB")
             self.visualize_button.config(state=tk.NORMAL)
             self.compare_button.config(state=tk.NORMAL)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to upload file: {str(e)}")
+            self.tune_button.config(state=tk.NORMAL)
+            self.export_button.config(state=tk.DISABLED)
+
+        self.start_job(f"Loading {os.path.basename(file_path)}...", work, done, "Failed to upload file")
+
+    def prepared_data(self, data, data_key, timings=None, profile_stage=None):
+        # Split and preprocessed once per dataset, then shared by every job and worker process.
+        # Jobs run one at a time, so this is never built twice at once.
+        if self.prepared is None or self.prepared[0] != data_key:
+            if self.prepared is not None:
+                self.prepared[1].close()
+            with measure([] if timings is None else timings, "split", None, profile_stage):
+                self.prepared = (data_key, prepare_data(data))
+        return self.prepared[1]
 
     def visualize_data(self):
         if self.data is None:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
 
-        try:
-            visualization = self.selected_visualization.get()
-            numeric_cols = self.data.select_dtypes(include=['number']).columns
+        visualization = self.selected_visualization.get()
+        if visualization in self.plot_cache:
+            self.render_visualization(visualization, self.plot_cache[visualization])
+            return
 
-            if visualization == "Correlation Heatmap":
-                plt.figure(figsize=(10, 6))
-                sns.heatmap(self.data[numeric_cols].corr(), annot=True, cmap="coolwarm")
-                plt.title("Correlation Heatmap")
-                plt.show()
+        data = self.data
 
-            elif visualization == "Bar Plot":
-                for col in numeric_cols[:1]:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].value_counts().head(10).plot(kind='bar', color='skyblue', title=f"Bar Graph for {col}")
-                    plt.xlabel(col)
-                    plt.ylabel("Count")
-                    plt.show()
-
-            elif visualization == "Scatter Plot" and len(numeric_cols) > 1:
-                plt.figure(figsize=(8, 6))
-                sns.scatterplot(data=self.data, x=numeric_cols[0], y=numeric_cols[1])
-                plt.title(f"Scatter Plot: {numeric_cols[0]} vs {numeric_cols[1]}")
-                plt.xlabel(numeric_cols[0])
-                plt.ylabel(numeric_cols[1])
-                plt.show()
+        def done(prepared):
+            self.plot_cache[visualization] = prepared
+            self.render_visualization(visualization, prepared)
 
-            elif visualization == "Histogram":
-                for col in numeric_cols:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].plot(kind='hist', bins=20, color='orange', title=f"Histogram for {col}")
-                    plt.xlabel(col)
-                    plt.ylabel("Frequency")
-                    plt.show()
-
-            elif visualization == "Pie Chart":
-                categorical_cols = self.data.select_dtypes(include=['object', 'category']).columns
-                for col in categorical_cols[:1]:
-                    plt.figure(figsize=(8, 6))
-                    self.data[col].value_counts().plot(kind='pie', autopct='%1.1f%%', title=f"Pie Chart for {col}")
-                    plt.ylabel('')
-                    plt.show()
+        self.start_job(f"Preparing {visualization or 'visualization'}...",
+                       lambda job: aggregate(data, visualization), done, "Failed to visualize data")
 
+    def render_visualization(self, visualization, prepared):
+        try:
+            timings = []
+            with measure(timings, "render", visualization, self.profiled_stage()):
+                render(visualization, prepared)
+            self.record_timings(timings)
+            plt.show()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to visualize data: {str(e)}")
 
@@ -147,54 +341,246 @@ class MLGuiApp:
         if self.data is None:
             messagebox.showwarning("No Data", "Please upload a file first.")
             return
+        if self.streaming_file:
+            self.compare_streaming_models()
+            return
+        if self.cross_validate.get():
+            self.compare_cross_validated()
+            return
 
-        try:
-            X = self.data.iloc[:, :-1]
-            y = self.data.iloc[:, -1]
+        data = self.data
+        data_key = self.data_key
+        models = dict(self.models)
+        profile_stage = self.profiled_stage()
+
+        def work(job):
+            timings = []
+            prepared = self.prepared_data(data, data_key, timings, profile_stage)
+
+            # Fit the models concurrently, each in its own worker process
+            return fit_models(models, *prepared.split(), self.n_jobs, job=job, cache=self.fit_cache,
+                              data_key=data_key, scaled=prepared.scaled(), timings=timings,
+                              profile_stage=profile_stage), timings
+
+        def done(result):
+            fitted, timings = result
+            self.record_timings(timings)
+            # Only a finished comparison replaces the models and results
+            for model_name, (model, accuracy) in fitted.items():
+                self.models[model_name] = model
+                self.results[model_name] = accuracy
+                self.cv_results.pop(model_name, None)
+                self.strategies[model_name] = getattr(model, "strategy_", None)
+
+            self.display_results_table()
+
+            messagebox.showinfo("Model Comparison", "Model accuracies calculated. Check the table below for details.")
+
+            for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button, self.export_button]:
+                button.config(state=tk.NORMAL)
+
+        self.start_job("Training models...", work, done, "Failed to compare models", steps=len(models),
+                       data_key=data_key)
+
+    def tune_models(self):
+        if self.data is None:
+            messagebox.showwarning("No Data", "Please upload a file first.")
+            return
+        if self.streaming_file:
+            messagebox.showwarning("Streaming Mode", "Hyperparameter search needs the data in memory. Upload the file again with streaming mode off.")
+            return
 
-            if not pd.api.types.is_numeric_dtype(y):
-                y = pd.factorize(y)[0]
+        data = self.data
+        data_key = self.data_key
+        models = dict(self.models)
+        method = {"Randomized": "random", "Halving": "halving"}[self.search_method.get()]
+        # Finished trials are logged on disk, so running the same search again resumes it
+        log = self.model_store.trial_log((data_key, method, self.search_budget))
+        profile_stage = self.profiled_stage()
+
+        def work(job):
+            timings = []
+            prepared = self.prepared_data(data, data_key, timings, profile_stage)
+
+            # Trials are cross-validated on the training split only; the test split scores the winners
+            searches = search_models(models, prepared.X_train, prepared.y_train, method, self.search_budget,
+                                     self.search_time_limit, n_jobs=self.n_jobs, job=job, log=log,
+                                     scaled_X=prepared.scaled_train)
+            tuned = {model_name: clone(models[model_name]).set_params(**search.best_params)
+                     for model_name, search in searches.items()}
+            return searches, fit_models(tuned, *prepared.split(), self.n_jobs, job=job, cache=self.fit_cache,
+                                        data_key=data_key, scaled=prepared.scaled(), timings=timings,
+                                        profile_stage=profile_stage), timings
+
+        def done(result):
+            searches, fitted, timings = result
+            self.record_timings(timings)
+            for model_name, (model, accuracy) in fitted.items():
+                self.models[model_name] = model
+                self.results[model_name] = accuracy
+                self.cv_results.pop(model_name, None)
+                self.strategies[model_name] = getattr(model, "strategy_", None)
+                self.search_results[model_name] = searches[model_name]
 
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+            self.display_results_table()
 
-            for model_name, model in self.models.items():
-                model.fit(X_train, y_train)
-                predictions = model.predict(X_test)
-                self.results[model_name] = accuracy_score(y_test, predictions)
+            summary = "\n".join(f"{model_name}: {search.best_score * 100:.2f}% CV accuracy after {search.trials} trial(s)"
+                                for model_name, search in searches.items())
+            # No results at all means the time limit was up before any trial finished
+            if not searches or not all(search.finished for search in searches.values()):
+                summary += "\n\nThe time limit was reached. Tune again to resume the search."
+            messagebox.showinfo("Hyperparameter Search", summary.strip())
+
+            for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button, self.export_button]:
+                button.config(state=tk.NORMAL)
+
+        self.start_job("Tuning hyperparameters...", work, done, "Failed to tune models", steps=self.search_budget,
+                       on_progress=self.show_search_progress, data_key=data_key)
+
+    def compare_cross_validated(self):
+        data = self.data
+        data_key = self.data_key
+        models = dict(self.models)
+        profile_stage = self.profiled_stage()
+
+        def work(job):
+            # Folds come from the training split, so the test split stays unseen as in compare_models
+            timings = []
+            prepared = self.prepared_data(data, data_key, timings, profile_stage)
+
+            # Folds and models run concurrently; clear losers stop after the first folds
+            cv_results = cross_validate_models(models, prepared.X_train, prepared.y_train, n_jobs=self.n_jobs,
+                                               job=job, scaled_X=prepared.scaled_train)
+            fold_rows = len(prepared.y_train) * (CV_FOLDS - 1) // CV_FOLDS
+            return cv_results, {model_name: model.strategy(fold_rows) for model_name, model in models.items()
+                                if hasattr(model, "strategy")}, timings
+
+        def done(result):
+            cv_results, strategies, timings = result
+            self.record_timings(timings)
+            for model_name, cv in cv_results.items():
+                self.cv_results[model_name] = cv
+                self.results[model_name] = cv.mean
+                self.strategies[model_name] = strategies.get(model_name)
 
             self.display_results_table()
 
-            messagebox.showinfo("Model Comparison", "Model accuracies calculated. Check the table below for details.")
+            messagebox.showinfo("Model Comparison", "Cross-validated accuracies calculated. Check the table below for details.")
 
-            for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button]:
+            for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button, self.export_button]:
                 button.config(state=tk.NORMAL)
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to compare models: {str(e)}")
+        self.start_job("Cross-validating models...", work, done, "Failed to cross-validate models",
+                       steps=len(models) * CV_FOLDS, on_progress=self.show_cv_progress, data_key=data_key)
+
+    def compare_streaming_models(self):
+        file_path = self.streaming_file
+        data_key = self.data_key
+
+        def done(fitted):
+            self.streaming_models = {model_name: model for model_name, (model, accuracy) in fitted.items()}
+            self.results = {model_name: accuracy for model_name, (model, accuracy) in fitted.items()}
+            self.cv_results = {}
+            self.strategies = {}
+
+            self.display_results_table()
+
+            messagebox.showinfo("Model Comparison", "Streaming model accuracies calculated on the held-out rows. Check the table below for details.")
+
+            # The per-model buttons evaluate the in-memory models, which weren't trained here
+            for button in [self.rf_button, self.lr_button, self.svm_button, self.dt_button, self.export_button]:
+                button.config(state=tk.DISABLED)
+
+        self.start_job("Training streaming models...", lambda job: fit_streaming(file_path, job=job), done,
+                       "Failed to compare streaming models", on_progress=self.show_stream_progress,
+                       data_key=data_key)
+
+    def export_best_model(self):
+        if not self.results or self.streaming_file:
+            messagebox.showwarning("No Results", "Please compare models first.")
+            return
+
+        model_name = max(self.results, key=self.results.get)
+        path = filedialog.asksaveasfilename(defaultextension=".joblib", initialfile=f"{model_name}.joblib",
+                                            filetypes=[("Exported model", "*.joblib")])
+        if not path:
+            return
+        data = self.data
+        data_key = self.data_key
+        model = self.models[model_name]
+
+        def work(job):
+            prepared = self.prepared_data(data, data_key)
+            # Cross-validation doesn't keep a fitted model; this fits one on the training split, or reuses the cached fit
+            fitted, accuracy = fit_models({model_name: model}, *prepared.split(), self.n_jobs, job=job,
+                                          cache=self.fit_cache, data_key=data_key, scaled=prepared.scaled())[model_name]
+            export_pipeline(prepared, fitted, path, name=model_name)
+            return accuracy
+
+        def done(accuracy):
+            self.pipeline_path = path
+            messagebox.showinfo("Export", f"{model_name} ({accuracy * 100:.2f}% test accuracy) and its preprocessing "
+                                          f"saved to {path}.\n\nScore new data with Score File, or run\n"
+                                          f"python ml_serve.py score {os.path.basename(path)} input.csv predictions.csv")
+
+        self.start_job(f"Exporting {model_name}...", work, done, "Failed to export model")
+
+    def score_data_file(self):
+        pipeline_path = self.pipeline_path or filedialog.askopenfilename(filetypes=[("Exported model", "*.joblib")])
+        if not pipeline_path:
+            return
+        input_path = filedialog.askopenfilename(filetypes=[("Data files", "*.csv *.parquet *.feather"), ("CSV files", "*.csv"),
+                                                           ("Parquet files", "*.parquet"), ("Feather files", "*.feather")])
+        if not input_path:
+            return
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", initialfile="predictions.csv",
+                                                   filetypes=[("CSV files", "*.csv"), ("Parquet files", "*.parquet")])
+        if not output_path:
+            return
+
+        def done(report):
+            messagebox.showinfo("Scoring", f"Scored {report['rows']:,} rows in {report['seconds']:.1f} s "
+                                           f"({report['rows_per_second']:,.0f} rows/s).\n\nPredictions saved to {output_path}.")
+
+        # Scored in chunks across worker processes, so memory stays flat for files of any size
+        self.start_job(f"Scoring {os.path.basename(input_path)}...",
+                       lambda job: score_file(pipeline_path, input_path, output_path, n_jobs=self.n_jobs, job=job),
+                       done, "Failed to score file", on_progress=self.show_score_progress)
 
     def show_model_accuracy(self, model_name):
         if model_name in self.results:
-            try:
-                X = self.data.iloc[:, :-1]
-                y = self.data.iloc[:, -1]
-
-                if not pd.api.types.is_numeric_dtype(y):
-                    y = pd.factorize(y)[0]
-
-                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-                model = self.models[model_name]
-                model.fit(X_train, y_train)
-                predictions = model.predict(X_test)
-
-                report = classification_report(y_test, predictions, output_dict=True)
-                precision = report['weighted avg']['precision']
-                recall = report['weighted avg']['recall']
-                f1_score = report['weighted avg']['f1-score']
-                accuracy = accuracy_score(y_test, predictions)
-
-                cm = confusion_matrix(y_test, predictions)
-                ConfusionMatrixDisplay(confusion_matrix=cm).plot(cmap="Blues")
-                plt.title(f"Confusion Matrix for {model_name}")
+            data = self.data
+            data_key = self.data_key
+            model = self.models[model_name]
+            profile_stage = self.profiled_stage()
+
+            def work(job):
+                # Reuse the fit from compare_models; only refit if the cache has evicted it
+                timings = []
+                key = (data_key, model_key(model))
+                entry = self.fit_cache.get(key)
+                if entry is None:
+                    prepared = self.prepared_data(data, data_key, timings, profile_stage)
+                    fit_models({model_name: model}, *prepared.split(), self.n_jobs, job=job,
+                               cache=self.fit_cache, data_key=data_key, scaled=prepared.scaled(),
+                               timings=timings, profile_stage=profile_stage)
+                    entry = self.fit_cache.get(key)
+                predictions, y_test = entry.predictions, entry.y_test
+
+                with measure(timings, "metrics", model_name, profile_stage):
+                    report = classification_report(y_test, predictions, output_dict=True)
+                    cm = confusion_matrix(y_test, predictions)
+                return (accuracy_score(y_test, predictions), report['weighted avg']['precision'],
+                        report['weighted avg']['recall'], report['weighted avg']['f1-score'], cm), timings
+
+            def done(result):
+                (accuracy, precision, recall, f1_score, cm), timings = result
+
+                with measure(timings, "render", model_name, profile_stage):
+                    ConfusionMatrixDisplay(confusion_matrix=cm).plot(cmap="Blues")
+                    plt.title(f"Confusion Matrix for {model_name}")
+                self.record_timings(timings)
+                self.display_results_table()
                 plt.show()
 
                 metrics_message = (f"Model: {model_name}\n\n"
@@ -204,27 +590,73 @@ class MLGuiApp:
                                    f"F1 Score: {f1_score:.2f}")
                 messagebox.showinfo(f"{model_name} Evaluation Metrics", metrics_message)
 
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to evaluate {model_name}: {str(e)}")
+            self.start_job(f"Evaluating {model_name}...", work, done, f"Failed to evaluate {model_name}",
+                           data_key=data_key)
 
     def display_results_table(self):
         for widget in self.table_frame.winfo_children():
             widget.destroy()
 
-        tree = ttk.Treeview(self.table_frame, columns=("Model", "Accuracy"), show="headings", height=5)
+        tree = ttk.Treeview(self.table_frame, columns=("Model", "Accuracy", "Folds", "Fold Times", "Wall", "CPU", "Peak RSS"), show="headings", height=10)
         tree.heading("Model", text="Model")
         tree.heading("Accuracy", text="Accuracy (%)")
-        tree.column("Model", anchor="center", width=200)
+        tree.heading("Folds", text="Folds")
+        tree.heading("Fold Times", text="Fold Times (s)")
+        tree.heading("Wall", text="Wall (s)")
+        tree.heading("CPU", text="CPU (s)")
+        tree.heading("Peak RSS", text="Peak RSS (MB)")
+        tree.column("Model", anchor="center", width=300)
         tree.column("Accuracy", anchor="center", width=150)
+        tree.column("Folds", anchor="center", width=80)
+        tree.column("Fold Times", anchor="center", width=200)
+        tree.column("Wall", anchor="center", width=90)
+        tree.column("CPU", anchor="center", width=90)
+        tree.column("Peak RSS", anchor="center", width=110)
+
+        # Stage timings hang under the row they belong to: the dataset's load and split (and plot
+        # renders) under a Dataset row, each model's fit, predict, metrics and render under the model.
+        # With show="headings" there is no expand toggle, so those parent rows are inserted open.
+        def stage_rows(parent, timings):
+            for timing in timings:
+                stage = timing.stage if timing.name is None or timing.name in self.results else f"{timing.stage}: {timing.name}"
+                tree.insert(parent, "end", values=(f"  {stage}", "", "", "", *self.timing_values([timing])))
+
+        dataset_timings = [timing for timing in self.stage_timings.values() if timing.name not in self.results]
+        if dataset_timings:
+            stage_rows(tree.insert("", "end", values=("Dataset", "", "", "", *self.timing_values(dataset_timings)),
+                                   open=True), dataset_timings)
 
         for model_name, accuracy in self.results.items():
-            tree.insert("", "end", values=(model_name, f"{accuracy * 100:.2f}"))
+            cv = self.cv_results.get(model_name)
+            label = f"{model_name} (tuned)" if model_name in self.search_results else model_name
+            strategy = self.strategies.get(model_name)
+            if strategy:
+                # Large datasets swap the kernel SVM for an approximation; say so next to its score
+                label += f" [{strategy}]"
+            timings = [timing for timing in self.stage_timings.values() if timing.name == model_name]
+            if cv is None:
+                row = tree.insert("", "end", values=(label, f"{accuracy * 100:.2f}", "", "", *self.timing_values(timings)),
+                                  open=True)
+            else:
+                folds = f"{len(cv.scores)} (pruned)" if cv.pruned else str(len(cv.scores))
+                fold_times = ", ".join(f"{seconds:.2f}" for seconds in cv.seconds)
+                row = tree.insert("", "end", values=(label, f"{cv.mean * 100:.2f} ± {cv.std * 100:.2f}", folds, fold_times,
+                                                     *self.timing_values(timings)), open=True)
+            stage_rows(row, timings)
 
         scrollbar = ttk.Scrollbar(self.table_frame, orient="vertical", command=tree.yview)
         tree.configure(yscroll=scrollbar.set)
         scrollbar.pack(side="right", fill="y")
         tree.pack(fill="both", expand=True)
 
+    def timing_values(self, timings):
+        # Wall and CPU time summed over the stages, peak RSS the highest of them
+        if not timings:
+            return "", "", ""
+        peaks = [timing.peak_rss_mb for timing in timings if timing.peak_rss_mb is not None]
+        return (f"{sum(timing.wall for timing in timings):.3f}", f"{sum(timing.cpu for timing in timings):.3f}",
+                f"{max(peaks):.1f}" if peaks else "")
+
     def run(self):
         self.root.mainloop()
 
@@ -0,0 +1,223 @@
+import argparse
+import concurrent.futures
+import csv
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sklearn.base import clone
+from sklearn.datasets import make_classification
+from sklearn.metrics import accuracy_score
+
+from ml_engine import (RANDOM_STATE, SVM_MAX_ROWS, ScalableSVC, default_models, load_dataset, needs_scaling,
+                       prepare_data, supports_inner_jobs, worker_budget)
+from process_memory import peak_rss_mb, reset_peak_rss
+
+# Row counts of the synthetic benchmark datasets
+BENCHMARK_SIZES = [1000, 10000, 100000]
+BENCHMARK_FEATURES = 20
+
+# The --svm benchmark only fits the exact SVC up to this many training rows,
+# past which a single fit can take hours
+SVM_EXACT_MAX_ROWS = 2 * SVM_MAX_ROWS
+
+RESULT_FIELDS = ["dataset", "rows", "features", "model", "strategy", "accuracy", "fit_seconds", "predict_seconds",
+                 "fit_rows_per_second", "predict_rows_per_second", "peak_rss_mb", "load_seconds", "prepare_seconds", "data_mb", "error"]
+
+
+def with_target_last(data, target=None):
+    """Reorder data so target is the last column, the layout split_data() expects."""
+    if target is None:
+        return data
+    if target not in data.columns:
+        raise ValueError(f"Target column {target!r} not found")
+    return data[[column for column in data.columns if column != target] + [target]]
+
+
+def svm_models():
+    """The SVM forced onto each of its fitting strategies, to compare their accuracy and cost."""
+    return {
+        'SVM (exact)': ScalableSVC(max_rows=float("inf")),
+        'SVM (Nystroem)': ScalableSVC(max_rows=0),
+        'SVM (linear)': ScalableSVC(kernel="linear", max_rows=0),
+    }
+
+
+def run_dataset(file_path, target=None, model_names=None, inner_jobs=1, svm=False):
+    """Load and preprocess one dataset, fit and time every model on it, and return a result row per model.
+
+    Runs in its own process, so peak_rss_mb is that of this dataset and model
+    alone: the counter is reset before each fit. With svm, the SVM strategies
+    from svm_models() are run instead of the default models.
+    """
+    start = time.perf_counter()
+    data, report = load_dataset(file_path)
+    data = with_target_last(data, target)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    prepared = prepare_data(data)
+    prepare_seconds = time.perf_counter() - start
+    y_train, y_test = prepared.y_train, prepared.y_test
+
+    common = {
+        "dataset": file_path,
+        "rows": len(data),
+        "features": data.shape[1] - 1,
+        "load_seconds": round(load_seconds, 4),
+        "prepare_seconds": round(prepare_seconds, 4),
+        "data_mb": round(report["bytes"] / (1024 * 1024), 2),
+    }
+    results = []
+    for name, model in (svm_models() if svm else default_models()).items():
+        if model_names and name not in model_names:
+            continue
+        if svm and model.max_rows == float("inf") and len(y_train) > SVM_EXACT_MAX_ROWS:
+            results.append({**common, "model": name, "error": f"skipped above {SVM_EXACT_MAX_ROWS:,} training rows"})
+            continue
+        model = clone(model)
+        if supports_inner_jobs(model):
+            model.set_params(n_jobs=inner_jobs)
+        X_train, X_test = prepared.scaled() if needs_scaling(model) else prepared.split()[:2]
+        X_train, X_test = X_train.load(), X_test.load()
+        try:
+            reset_peak_rss()
+            start = time.perf_counter()
+            model.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            predictions = model.predict(X_test)
+            predict_seconds = time.perf_counter() - start
+            peak = peak_rss_mb()
+        except Exception as e:
+            results.append({**common, "model": name, "error": str(e)})
+            continue
+        results.append({
+            **common,
+            "model": name,
+            "strategy": getattr(model, "strategy_", None),
+            "accuracy": round(accuracy_score(y_test, predictions), 4),
+            "fit_seconds": round(fit_seconds, 4),
+            "predict_seconds": round(predict_seconds, 4),
+            "fit_rows_per_second": round(len(y_train) / fit_seconds, 1) if fit_seconds else None,
+            "predict_rows_per_second": round(len(y_test) / predict_seconds, 1) if predict_seconds else None,
+            "peak_rss_mb": None if peak is None else round(peak, 1),
+        })
+    prepared.close()
+    return results
+
+
+def run_datasets(file_paths, target=None, model_names=None, jobs=None, n_jobs=None, svm=False):
+    """Run run_dataset() over every file, jobs datasets at a time, yielding result rows as each finishes.
+
+    Each dataset gets a fresh spawned process, so peak memory isn't inherited
+    from an earlier one, and the n_jobs worker budget is split between the
+    datasets running at once.
+    """
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(file_paths)))
+    inner_jobs = max(1, worker_budget(n_jobs) // jobs)
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(jobs, mp_context=context, max_tasks_per_child=1) as executor:
+        futures = {executor.submit(run_dataset, file_path, target, model_names, inner_jobs, svm): file_path
+                   for file_path in file_paths}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                yield from future.result()
+            except Exception as e:
+                yield {"dataset": futures[future], "error": str(e)}
+
+
+def make_benchmark_datasets(directory, sizes=BENCHMARK_SIZES, features=BENCHMARK_FEATURES, seed=RANDOM_STATE):
+    """Write seeded synthetic classification datasets of each size as Parquet files and return their paths."""
+    paths = []
+    for rows in sizes:
+        X, y = make_classification(n_samples=rows, n_features=features, n_informative=features // 2,
+                                   n_classes=3, random_state=seed)
+        data = pd.DataFrame(X, columns=[f"feature_{index}" for index in range(features)])
+        data["target"] = y
+        path = os.path.join(directory, f"synthetic_{rows}.parquet")
+        data.to_parquet(path)
+        paths.append(path)
+    return paths
+
+
+def write_results(results, output):
+    if output.endswith(".csv"):
+        with open(output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+        return
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def describe(result):
+    name = f"{os.path.basename(result['dataset'])} {result.get('model', '')}".strip()
+    if result.get("error"):
+        return f"{name}: failed: {result['error']}"
+    if result.get("strategy"):
+        name += f" [{result['strategy']}]"
+    line = (f"{name}: accuracy {result['accuracy']:.4f}, fit {result['fit_seconds']:.3f} s "
+            f"({result['fit_rows_per_second']:,.0f} rows/s), predict {result['predict_seconds']:.3f} s")
+    if result["peak_rss_mb"] is not None:
+        line += f", peak RSS {result['peak_rss_mb']:.1f} MB"
+    return line
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the ml_app models on datasets without the GUI.")
+    parser.add_argument("datasets", nargs="*", help="CSV, Excel, Parquet or Feather files")
+    parser.add_argument("--target", help="target column (default: the last column of each dataset)")
+    parser.add_argument("--models", nargs="+", choices=list(default_models()) + list(svm_models()), metavar="MODEL",
+                        help="models to run (default: all)")
+    parser.add_argument("--jobs", type=int, help="datasets to run at once (default: one per core)")
+    parser.add_argument("--n-jobs", type=int, help="total cores to use (default: all)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="also run the synthetic benchmark datasets; run with --jobs 1 for comparable timings")
+    parser.add_argument("--sizes", type=int, nargs="+", default=BENCHMARK_SIZES,
+                        help=f"benchmark dataset row counts (default: {' '.join(map(str, BENCHMARK_SIZES))})")
+    parser.add_argument("--svm", action="store_true",
+                        help="compare the exact SVM with its scalable approximations instead of the default models")
+    parser.add_argument("--output", default="ml_batch.json", help="results file, .json or .csv (default: ml_batch.json)")
+    args = parser.parse_args(argv)
+    if not args.datasets and not args.benchmark:
+        parser.error("give at least one dataset or --benchmark")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="ml_batch_") as directory:
+        datasets = list(args.datasets)
+        target = args.target
+        if args.benchmark:
+            if datasets and target not in (None, "target"):
+                print("Error: --target must be 'target' or unset when mixing datasets with --benchmark", file=sys.stderr)
+                sys.exit(1)
+            datasets += make_benchmark_datasets(directory, args.sizes)
+
+        results = []
+        for result in run_datasets(datasets, target, args.models, args.jobs, args.n_jobs, args.svm):
+            results.append(result)
+            print(describe(result))
+
+    write_results(results, args.output)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1399 @@
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import cProfile
+import hashlib
+import json
+import os
+import pickle
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import weakref
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib.externals.loky import get_reusable_executor
+from scipy import stats
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import BaseEnsemble, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import KFold, ParameterSampler, StratifiedKFold, cross_val_score, train_test_split
+from sklearn.naive_bayes import GaussianNB, MultinomialNB
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, OneHotEncoder, OrdinalEncoder, StandardScaler
+from sklearn.svm import SVC, LinearSVC
+from sklearn.tree import BaseDecisionTree, DecisionTreeClassifier
+
+from process_memory import peak_rss_mb, reset_peak_rss
+
+# Train/test split used by every comparison
+TEST_SIZE = 0.3
+RANDOM_STATE = 42
+
+# Categorical features with at most this many categories are one-hot
+# encoded, the rest ordinal encoded
+ONE_HOT_MAX_CATEGORIES = 20
+
+# Bumped whenever prepare_data() changes what models are trained on, so
+# earlier fits in the model store aren't reused
+PREPROCESSING_VERSION = 2
+
+# Above this many training rows ScalableSVC swaps the exact kernel SVC, whose
+# fit time grows quadratically or worse with rows, for a Nystroem kernel
+# approximation with this many components feeding a linear SVM
+SVM_MAX_ROWS = 50000
+NYSTROEM_COMPONENTS = 500
+
+# Default memory budget for FitCache
+FIT_CACHE_BYTES = 512 * 1024 * 1024
+
+# Rows per chunk when reading CSV files
+CSV_CHUNK_ROWS = 100000
+
+# String columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+# Rows per chunk when training streaming models
+STREAM_CHUNK_ROWS = 50000
+
+# Rows per chunk when scoring a file with an exported pipeline
+SCORE_CHUNK_ROWS = 50000
+
+# Cross-validation: folds per model, folds every model runs before the
+# losers are pruned, and how far below the best a model must be to be pruned
+CV_FOLDS = 5
+CV_PRUNE_AFTER = 2
+CV_PRUNE_MARGIN = 0.02
+
+# Hyperparameter search: total trials shared by all models, time limit in
+# seconds, folds per trial and halving's keep-one-in-ETA factor
+SEARCH_BUDGET = 60
+SEARCH_TIME_LIMIT = 600
+SEARCH_FOLDS = 3
+SEARCH_ETA = 3
+SEARCH_METHODS = ("random", "halving")
+
+# Search spaces by estimator class name: lists are sampled uniformly, scipy
+# distributions through their rvs()
+SEARCH_SPACES = {
+    "RandomForestClassifier": {
+        "n_estimators": stats.randint(50, 400),
+        "max_depth": [None, 5, 10, 20, 40],
+        "min_samples_leaf": stats.randint(1, 10),
+        "max_features": ["sqrt", "log2", None],
+    },
+    "LogisticRegression": {
+        "C": stats.loguniform(1e-3, 1e2),
+    },
+    "SVC": {
+        "C": stats.loguniform(1e-2, 1e3),
+        "gamma": stats.loguniform(1e-4, 1e0),
+    },
+    "ScalableSVC": {
+        "C": stats.loguniform(1e-2, 1e3),
+        "gamma": stats.loguniform(1e-4, 1e0),
+    },
+    "DecisionTreeClassifier": {
+        "max_depth": [None, 3, 5, 10, 20],
+        "min_samples_leaf": stats.randint(1, 20),
+        "criterion": ["gini", "entropy"],
+    },
+}
+
+# Pipeline stages measure() times, and where cProfile output of a profiled
+# stage is written
+PROFILE_STAGES = ("load", "split", "fit", "predict", "metrics", "render")
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "ml_app_profiles")
+
+# Default location and disk budget for ModelStore
+MODEL_STORE_DIR = os.path.join(os.path.expanduser("~"), ".ml_app_cache")
+MODEL_STORE_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class CancelledError(Exception):
+    """Raised inside a background job once it has been cancelled."""
+
+
+class Job:
+    """Handle passed to a BackgroundRunner job: progress reporting and cancellation."""
+
+    def __init__(self, runner, work, on_done, on_error, on_progress, on_cancel):
+        self.runner = runner
+        self.work = work
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.cancel_event = threading.Event()
+
+    def progress(self, *args):
+        if self.on_progress is not None:
+            self.runner.events.put((self.on_progress, args))
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise CancelledError()
+
+
+class BackgroundRunner:
+    """Run jobs one at a time on a worker thread and hand their results back to Tk.
+
+    submit() queues work(job) for the worker thread. Callbacks (on_done,
+    on_error, on_progress, on_cancel) are only ever called on the Tk thread:
+    the worker posts them to a queue that is drained with root.after().
+    """
+
+    def __init__(self, root, poll_ms=100):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.jobs = queue.Queue()
+        self.events = queue.Queue()
+        self.current = None
+        threading.Thread(target=self._run, daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def submit(self, work, on_done=None, on_error=None, on_progress=None, on_cancel=None):
+        job = Job(self, work, on_done, on_error, on_progress, on_cancel)
+        self.jobs.put(job)
+        return job
+
+    def busy(self):
+        return self.current is not None or not self.jobs.empty()
+
+    def cancel_all(self):
+        """Cancel the running job and drop every job still waiting."""
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job.on_cancel is not None:
+                self.events.put((job.on_cancel, ()))
+        current = self.current
+        if current is not None:
+            current.cancel()
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            self.current = job
+            try:
+                if job.cancelled():
+                    raise CancelledError()
+                result = job.work(job)
+                if job.on_done is not None:
+                    self.events.put((job.on_done, (result,)))
+            except CancelledError:
+                if job.on_cancel is not None:
+                    self.events.put((job.on_cancel, ()))
+            except Exception as e:
+                if job.on_error is not None:
+                    self.events.put((job.on_error, (e,)))
+            finally:
+                self.current = None
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    callback, args = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(*args)
+                except Exception:
+                    # Reported the way Tk reports any failing callback; the other events still run
+                    self.root.report_callback_exception(*sys.exc_info())
+        finally:
+            self.root.after(self.poll_ms, self._poll)
+
+
+def optimize_dtypes(data, category_columns=None):
+    """Shrink a DataFrame in place: downcast ints and floats (to float32) and make categoricals.
+
+    category_columns lists the columns to turn into categoricals, whatever
+    their dtype; by default, the string columns with at most CATEGORY_RATIO
+    distinct values per row.
+    """
+    for column in data.columns:
+        series = data[column]
+        if category_columns is not None and column in category_columns:
+            data[column] = series.astype("category")
+            continue
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            data[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            data[column] = series.astype("float32")
+        elif is_text(series) and category_columns is None:
+            if len(series) > 0 and series.nunique() <= CATEGORY_RATIO * len(series):
+                data[column] = series.astype("category")
+    return data
+
+
+def is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def concat_chunks(chunks):
+    # Chunks can disagree on categories; give every categorical column the union first
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            categories = pd.api.types.union_categoricals([chunk[column] for chunk in chunks]).categories
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def load_dataset(file_path, chunk_rows=CSV_CHUNK_ROWS, optimize=True, memory_map=False, job=None):
+    """Load a CSV, Excel, Parquet or Feather file into a memory-lean DataFrame.
+
+    CSV files are read chunk_rows rows at a time and each chunk is shrunk by
+    optimize_dtypes() before the next is read, so the full default-dtype frame
+    never exists. Parquet and Feather files can be memory-mapped. Returns
+    (data, report) where report holds the default-dtype and loaded sizes in
+    bytes and the load time in seconds.
+    """
+    start = time.perf_counter()
+    extension = os.path.splitext(file_path)[1].lower()
+    raw_bytes = 0
+
+    if extension == ".csv":
+        chunks = []
+        category_columns = None
+        dtype = None
+        if optimize:
+            # Decide on the first chunk so every chunk gets the same column types. The
+            # planned columns are read as strings throughout: in a chunk where one is
+            # all missing it would otherwise come back as float64.
+            head = pd.read_csv(file_path, nrows=chunk_rows)
+            category_columns = [column for column in head.columns if is_text(head[column])
+                                and head[column].nunique() <= CATEGORY_RATIO * len(head)]
+            dtype = dict.fromkeys(category_columns, str)
+        for chunk in pd.read_csv(file_path, chunksize=chunk_rows, dtype=dtype):
+            if job is not None:
+                job.check_cancelled()
+            raw_bytes += chunk.memory_usage(deep=True).sum()
+            if optimize:
+                optimize_dtypes(chunk, category_columns)
+            chunks.append(chunk)
+        data = concat_chunks(chunks) if chunks else pd.read_csv(file_path)
+    else:
+        if extension == ".parquet":
+            data = pd.read_parquet(file_path, memory_map=memory_map)
+        elif extension == ".feather":
+            import pyarrow.feather
+
+            data = pyarrow.feather.read_table(file_path, memory_map=memory_map).to_pandas()
+        else:
+            data = pd.read_excel(file_path)
+        raw_bytes = data.memory_usage(deep=True).sum()
+        if optimize:
+            optimize_dtypes(data)
+
+    report = {
+        "raw_bytes": int(raw_bytes),
+        "bytes": int(data.memory_usage(deep=True).sum()),
+        "seconds": time.perf_counter() - start,
+    }
+    return data, report
+
+
+def feature_target(data):
+    """Split data into features X and target y, taking the last column as the target.
+
+    A non-numeric target is encoded as integer codes; classes then holds the
+    original label of each code (a missing label is a class of its own), and
+    is None for a numeric target. Returns (X, y, classes).
+    """
+    X = data.iloc[:, :-1]
+    y = data.iloc[:, -1]
+    classes = None
+
+    if not pd.api.types.is_numeric_dtype(y):
+        y, classes = pd.factorize(y, use_na_sentinel=False)
+        classes = np.asarray(classes, dtype=object)
+        classes[pd.isna(classes)] = None
+
+    return X, y, classes
+
+
+def split_data(data, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Split data into X_train, X_test, y_train, y_test and classes, taking the last column as the target."""
+    X, y, classes = feature_target(data)
+    return (*train_test_split(X, y, test_size=test_size, random_state=random_state), classes)
+
+
+def file_key(file_path, data, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Fingerprint of a data file's bytes, the dtypes it was loaded with and the feature/target split."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    columns = [str(column) for column in data.columns]
+    dtypes = [str(dtype) for dtype in data.dtypes]
+    digest.update(repr((columns[:-1], columns[-1], dtypes, test_size, random_state, PREPROCESSING_VERSION)).encode())
+    return digest.hexdigest()
+
+
+class SharedArray:
+    """An array dumped to disk once and memory-mapped read-only by every process that loads it.
+
+    Pickling one only pickles its path, so worker processes share the
+    operating system's page cache instead of each receiving a copy. Works
+    for NumPy arrays and SciPy sparse matrices alike.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def dump(cls, array, path):
+        joblib.dump(array, path)
+        return cls(path)
+
+    def load(self):
+        return joblib.load(self.path, mmap_mode="r")
+
+
+def resolve(value):
+    return value.load() if isinstance(value, SharedArray) else value
+
+
+def build_preprocessor(X):
+    """Impute and encode X's columns: median-imputed numbers, one-hot or ordinal encoded categoricals.
+
+    Boolean columns are treated as numbers, 0.0 or 1.0. Output is sparse
+    when one-hot columns make it mostly zeros.
+    """
+    boolean = [column for column in X.columns if pd.api.types.is_bool_dtype(X[column])]
+    numeric = [column for column in X.columns if pd.api.types.is_numeric_dtype(X[column])
+               and column not in boolean]
+    categorical = [column for column in X.columns if column not in numeric and column not in boolean]
+    one_hot = [column for column in categorical if X[column].nunique() <= ONE_HOT_MAX_CATEGORIES]
+    ordinal = [column for column in categorical if column not in one_hot]
+
+    transformers = []
+    if numeric:
+        transformers.append(("numeric", SimpleImputer(strategy="median"), numeric))
+    if boolean:
+        # SimpleImputer rejects bool data, so cast it to float first
+        transformers.append(("boolean", make_pipeline(
+            FunctionTransformer(as_float, feature_names_out="one-to-one"),
+            SimpleImputer(strategy="median")), boolean))
+    if one_hot:
+        transformers.append(("one_hot", make_pipeline(
+            SimpleImputer(strategy="most_frequent"),
+            OneHotEncoder(handle_unknown="ignore", sparse_output=True, dtype=np.float32)), one_hot))
+    if ordinal:
+        transformers.append(("ordinal", make_pipeline(
+            SimpleImputer(strategy="most_frequent"),
+            OrdinalEncoder(handle_unknown="use_encoded_value", unknown_value=-1, dtype=np.float32)), ordinal))
+    return ColumnTransformer(transformers)
+
+
+def as_float(X):
+    return X.astype(np.float64)
+
+
+def needs_scaling(model):
+    # Trees split on thresholds and don't care about feature scale; SVC and
+    # LogisticRegression do
+    return not isinstance(model, (BaseEnsemble, BaseDecisionTree))
+
+
+class PreparedData:
+    """A dataset's train/test split after preprocessing, shared read-only by every model and worker.
+
+    The preprocessor is fitted on the training split only. Every matrix is
+    stored as a SharedArray in a temporary directory, which is removed when
+    the object is closed or garbage collected. Tree models get the imputed
+    and encoded features as float32; other models get a float64 copy scaled
+    by a StandardScaler, without centering when the features are sparse.
+    A non-numeric target is trained on as integer codes; classes maps them
+    back to the labels (None for a numeric target).
+    """
+
+    def __init__(self, data, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+        X_train, X_test, self.y_train, self.y_test, self.classes = split_data(data, test_size, random_state)
+        self.y_train = np.asarray(self.y_train)
+        self.y_test = np.asarray(self.y_test)
+        self.preprocessor = build_preprocessor(X_train)
+        plain_train = self.preprocessor.fit_transform(X_train).astype(np.float32)
+        plain_test = self.preprocessor.transform(X_test).astype(np.float32)
+        self.scaler = StandardScaler(with_mean=not sparse.issparse(plain_train))
+        scaled_train = self.scaler.fit_transform(plain_train.astype(np.float64))
+        scaled_test = self.scaler.transform(plain_test.astype(np.float64))
+
+        self.directory = tempfile.mkdtemp(prefix="ml_app_data_")
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+        self.X_train, self.X_test, self.scaled_train, self.scaled_test = (
+            SharedArray.dump(array, os.path.join(self.directory, name + ".joblib"))
+            for name, array in [("X_train", plain_train), ("X_test", plain_test),
+                                ("scaled_train", scaled_train), ("scaled_test", scaled_test)])
+        self.n_features = plain_train.shape[1]
+
+    def split(self):
+        """(X_train, X_test, y_train, y_test) for fit_models(), with scaled=self.scaled()."""
+        return self.X_train, self.X_test, self.y_train, self.y_test
+
+    def scaled(self):
+        return self.scaled_train, self.scaled_test
+
+    def close(self):
+        self._finalizer()
+
+
+def prepare_data(data, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """Split and preprocess data once, for every model and worker process to share."""
+    return PreparedData(data, test_size, random_state)
+
+
+def model_key(model):
+    """Estimator type and hyperparameters, ignoring n_jobs which doesn't change the fit."""
+    params = {name: value for name, value in model.get_params().items() if not name.endswith("n_jobs")}
+    return f"{type(model).__name__}{sorted(params.items(), key=lambda item: item[0])!r}"
+
+
+FittedModel = collections.namedtuple("FittedModel", "model accuracy predictions y_test")
+
+CrossValidation = collections.namedtuple("CrossValidation", "mean std scores seconds pruned")
+
+SearchResult = collections.namedtuple("SearchResult", "best_params best_score trials finished")
+
+Timing = collections.namedtuple("Timing", "stage name start wall cpu peak_rss_mb pid thread profile")
+
+
+class ModelStore:
+    """Content-addressed on-disk store of fitted models, shared across sessions.
+
+    Each (file_key, model_key) pair is saved as a joblib file named after
+    its hash, next to a small JSON file describing it. A file's mtime is its
+    last use, and the least recently used entries are deleted once the store
+    is over max_bytes. An entry bigger than max_bytes on its own is not
+    stored at all, rather than clearing the store to make room for it.
+    """
+
+    def __init__(self, directory=MODEL_STORE_DIR, max_bytes=MODEL_STORE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + ".joblib")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            entry = FittedModel(*joblib.load(path))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Unreadable (e.g. written by another scikit-learn version): drop it
+            self._remove(path)
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        joblib.dump(tuple(entry), path + ".tmp")
+        if os.path.getsize(path + ".tmp") > self.max_bytes:
+            os.remove(path + ".tmp")
+            return
+        os.replace(path + ".tmp", path)
+        data_key, model = key
+        with open(path + ".json", "w") as file:
+            json.dump({"data_key": data_key, "model": model, "accuracy": float(entry.accuracy),
+                       "created": time.strftime("%Y-%m-%d %H:%M:%S")}, file)
+        self.evict()
+
+    def entries(self):
+        """Describe every stored entry, most recently used first."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            if not name.endswith(".joblib"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(path + ".json") as file:
+                    info = json.load(file)
+            except (OSError, ValueError):
+                info = {}
+            entries.append({**info, "path": path, "bytes": stat.st_size, "last_used": stat.st_mtime})
+        return sorted(entries, key=lambda entry: entry["last_used"], reverse=True)
+
+    def total_bytes(self):
+        return sum(entry["bytes"] for entry in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(entry["bytes"] for entry in entries)
+        # The most recently used entry always stays
+        while total > self.max_bytes and len(entries) > 1:
+            oldest = entries.pop()
+            self._remove(oldest["path"])
+            total -= oldest["bytes"]
+
+    def purge(self):
+        """Delete every stored entry and search trial log, and return how many entries there were."""
+        entries = self.entries()
+        for entry in entries:
+            self._remove(entry["path"])
+        searches = os.path.join(self.directory, "searches")
+        if os.path.isdir(searches):
+            for name in os.listdir(searches):
+                self._remove(os.path.join(searches, name))
+        return len(entries)
+
+    def trial_log(self, key):
+        """The TrialLog kept for the hyperparameter search identified by key."""
+        name = hashlib.sha256(repr(key).encode()).hexdigest() + ".jsonl"
+        return TrialLog(os.path.join(self.directory, "searches", name))
+
+    def _remove(self, path):
+        for stale in (path, path + ".json"):
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
+
+
+class TrialLog:
+    """Append-only JSON-lines record of finished search trials, so a search can resume after a restart."""
+
+    def __init__(self, path):
+        self.path = path
+        self.trials = {}
+        try:
+            with open(path) as file:
+                for line in file:
+                    try:
+                        trial = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short when the app was killed mid-write
+                    self.trials[trial["key"]] = trial
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        return self.trials.get(key)
+
+    def record(self, key, **info):
+        trial = {"key": key, **info}
+        self.trials[key] = trial
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a") as file:
+            file.write(json.dumps(trial) + "\n")
+
+
+class FitCache:
+    """LRU cache of fitted models and their test-set predictions, bounded by a memory budget.
+
+    Keys are (file_key, model_key) pairs. Sizes are estimated from the
+    pickled model plus the prediction arrays. With a ModelStore, misses fall
+    through to disk and new entries are written to it as well.
+    """
+
+    def __init__(self, max_bytes=FIT_CACHE_BYTES, store=None):
+        self.max_bytes = max_bytes
+        self.store = store
+        self.entries = collections.OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.put(key, entry)
+
+    def _remember(self, key, entry):
+        size = len(pickle.dumps(entry.model, protocol=pickle.HIGHEST_PROTOCOL))
+        size += getattr(entry.predictions, "nbytes", 0) + getattr(entry.y_test, "nbytes", 0)
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.sizes.pop(key)
+                del self.entries[key]
+            self.entries[key] = entry
+            self.sizes[key] = size
+            self.total_bytes += size
+            # Always keep the newest entry, even if it alone is over budget
+            while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                evicted, _ = self.entries.popitem(last=False)
+                self.total_bytes -= self.sizes.pop(evicted)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.total_bytes = 0
+
+
+class ScalableSVC(ClassifierMixin, BaseEstimator):
+    """SVC that switches to a scalable approximation on large training sets.
+
+    Up to max_rows training rows this fits an ordinary SVC. Above it, a
+    linear kernel becomes a LinearSVC and any other kernel a Nystroem
+    approximation of n_components features, with gamma resolved the way SVC
+    would, feeding a hinge-loss SGDClassifier whose alpha = 1 / (C * rows)
+    matches SVC's regularization. Both scale linearly with the rows. strategy_ names the approximation used, or
+    is None when the exact SVC was fitted.
+    """
+
+    def __init__(self, C=1.0, kernel="rbf", gamma="scale", max_rows=SVM_MAX_ROWS,
+                 n_components=NYSTROEM_COMPONENTS, random_state=RANDOM_STATE):
+        self.C = C
+        self.kernel = kernel
+        self.gamma = gamma
+        self.max_rows = max_rows
+        self.n_components = n_components
+        self.random_state = random_state
+
+    def strategy(self, rows):
+        """The approximation a fit on this many rows will use, or None for the exact SVC."""
+        if rows <= self.max_rows:
+            return None
+        if self.kernel == "linear":
+            return "LinearSVC"
+        return f"Nystroem({min(self.n_components, rows)}) + SGD"
+
+    def _gamma(self, X):
+        if self.gamma == "scale":
+            if sparse.issparse(X):
+                variance = X.multiply(X).mean() - X.mean() ** 2
+            else:
+                variance = np.asarray(X).var()
+            return 1.0 / (X.shape[1] * variance) if variance else 1.0
+        if self.gamma == "auto":
+            return 1.0 / X.shape[1]
+        return self.gamma
+
+    def fit(self, X, y):
+        rows = X.shape[0]
+        if rows <= self.max_rows:
+            estimator = SVC(C=self.C, kernel=self.kernel, gamma=self.gamma)
+        elif self.kernel == "linear":
+            estimator = LinearSVC(C=self.C, random_state=self.random_state)
+        else:
+            estimator = make_pipeline(
+                Nystroem(kernel=self.kernel, gamma=self._gamma(X), n_components=min(self.n_components, rows),
+                         random_state=self.random_state),
+                SGDClassifier(loss="hinge", alpha=1.0 / (self.C * rows), random_state=self.random_state))
+        self.estimator_ = estimator.fit(X, y)
+        self.strategy_ = self.strategy(rows)
+        self.classes_ = self.estimator_.classes_
+        return self
+
+    def predict(self, X):
+        return self.estimator_.predict(X)
+
+    def decision_function(self, X):
+        return self.estimator_.decision_function(X)
+
+
+def default_models():
+    """The model set every comparison starts from."""
+    return {
+        'Random Forest': RandomForestClassifier(),
+        'Logistic Regression': LogisticRegression(max_iter=1000),
+        'SVM': ScalableSVC(),
+        'Decision Tree': DecisionTreeClassifier()
+    }
+
+
+@contextlib.contextmanager
+def measure(timings, stage, name=None, profile_stage=None):
+    """Time the with-block as one pipeline stage and append its Timing to timings.
+
+    start is the epoch time, so timings from worker processes line up on one
+    trace. cpu is the whole process's CPU time, which includes any threads
+    the block starts. peak_rss_mb is the process's peak during the block
+    where the kernel counter can be reset (Linux), its lifetime peak
+    elsewhere. When stage is profile_stage the block runs under cProfile and
+    the stats are written to PROFILE_DIR; profile is then their path.
+    """
+    profiler = cProfile.Profile() if stage == profile_stage else None
+    reset_peak_rss()
+    start = time.time()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        path = None
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            label = "".join(c if c.isalnum() else "_" for c in f"{stage}_{name or ''}").strip("_")
+            path = os.path.join(PROFILE_DIR, f"{label}_{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}.prof")
+            profiler.dump_stats(path)
+        timings.append(Timing(stage, name, start, time.perf_counter() - wall, time.process_time() - cpu,
+                              peak_rss_mb(), os.getpid(), threading.get_ident(), path))
+
+
+def write_trace(timings, path):
+    """Save timings as a Chrome trace (chrome://tracing, Perfetto), one complete event per stage."""
+    events = [{
+        "name": f"{timing.stage} {timing.name}" if timing.name else timing.stage,
+        "cat": timing.stage,
+        "ph": "X",
+        "ts": timing.start * 1e6,
+        "dur": timing.wall * 1e6,
+        "pid": timing.pid,
+        "tid": timing.thread,
+        "args": {"cpu_seconds": timing.cpu, "peak_rss_mb": timing.peak_rss_mb, "profile": timing.profile},
+    } for timing in timings]
+    with open(path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+def worker_budget(n_jobs=None):
+    """Number of cores a comparison may use: n_jobs, or every core when it's None or <= 0."""
+    cores = os.cpu_count() or 1
+    if n_jobs is None or n_jobs <= 0:
+        return cores
+    return min(n_jobs, cores)
+
+
+def supports_inner_jobs(model):
+    # Ensembles like RandomForest fit their members in parallel through n_jobs;
+    # other estimators either ignore it or (LogisticRegression) deprecate it
+    return isinstance(model, BaseEnsemble) and "n_jobs" in model.get_params()
+
+
+def plan_jobs(models, n_jobs=None):
+    """Split the worker budget between models so the two kinds of parallelism don't oversubscribe.
+
+    Every model gets one process. Cores left over after the single-threaded
+    models are shared out between the models that can use n_jobs internally.
+    Returns (processes, {model_name: inner_jobs}).
+    """
+    budget = worker_budget(n_jobs)
+    processes = max(1, min(len(models), budget))
+    parallel = [name for name, model in models.items() if supports_inner_jobs(model)]
+    spare = budget - (len(models) - len(parallel))
+    inner = max(1, spare // len(parallel)) if parallel else 1
+    return processes, {name: inner if name in parallel else 1 for name in models}
+
+
+def fit_and_score(name, model, X_train, X_test, y_train, y_test, profile_stage=None):
+    timings = []
+    with measure(timings, "fit", name, profile_stage):
+        model.fit(resolve(X_train), y_train)
+    with measure(timings, "predict", name, profile_stage):
+        predictions = model.predict(resolve(X_test))
+    return name, model, accuracy_score(y_test, predictions), predictions, timings
+
+
+def fold_splitter(y, folds=CV_FOLDS, random_state=RANDOM_STATE):
+    # Stratify unless some class has fewer rows than there are folds
+    counts = np.unique(np.asarray(y), return_counts=True)[1]
+    splitter = StratifiedKFold if counts.min() >= folds else KFold
+    return splitter(n_splits=folds, shuffle=True, random_state=random_state)
+
+
+def score_fold(name, fold, model, X, y, train, test):
+    start = time.perf_counter()
+    X = resolve(X)
+    accuracy = fit_and_score(name, model, take(X, train), take(X, test), take(y, train), take(y, test))[2]
+    return name, fold, accuracy, time.perf_counter() - start
+
+
+def completed(executor, pending, job=None, calls=(), limit=None, deadline=None):
+    """Yield the results of futures as they finish.
+
+    calls is an optional iterator of (function, *args) tuples submitted as
+    earlier futures finish, keeping at most limit in flight. Once
+    time.monotonic() passes deadline, nothing more is submitted and the
+    futures still running are abandoned: the executor's workers are killed
+    and iteration stops. If the BackgroundRunner
+    job is cancelled, the executor's workers are killed, since a fit can't
+    be interrupted in-process, and CancelledError is raised.
+    """
+    calls = iter(calls)
+    pending = set(pending)
+    while True:
+        while (limit is None or len(pending) < limit) and (deadline is None or time.monotonic() < deadline):
+            call = next(calls, None)
+            if call is None:
+                break
+            pending.add(executor.submit(*call))
+        if not pending:
+            return
+        timeout = 0.2 if deadline is None else max(0.0, min(0.2, deadline - time.monotonic()))
+        done, pending = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+        if job is not None and job.cancelled():
+            executor.shutdown(wait=False, kill_workers=True)
+            raise CancelledError()
+        for future in done:
+            yield future.result()
+        if pending and deadline is not None and time.monotonic() >= deadline:
+            executor.shutdown(wait=False, kill_workers=True)
+            return
+
+
+def fit_models(models, X_train, X_test, y_train, y_test, n_jobs=None, job=None, cache=None, data_key=None,
+               scaled=None, timings=None, profile_stage=None):
+    """Fit and score every model concurrently in worker processes.
+
+    X_train and X_test may be SharedArrays. With scaled, a (scaled_train,
+    scaled_test) pair as from PreparedData.scaled(), models that
+    needs_scaling() are fitted on those instead.
+
+    Returns {model_name: (fitted_model, accuracy)} in the order of models.
+    The estimators passed in are left untouched; fitted copies come back.
+    With a BackgroundRunner job, job.progress(model_name, accuracy, done,
+    total) is reported as each model finishes, and cancelling the job stops
+    the fits still running and raises CancelledError.
+
+    With a FitCache and the data_key of the split, models already fitted on
+    that split are taken from the cache, and new fits are added to it.
+
+    With a timings list, the measure() Timing of every fit and predict run
+    is appended to it; profile_stage ("fit" or "predict") runs that stage
+    under cProfile in the workers.
+    """
+    fitted = {}
+    keys = {name: (data_key, model_key(model)) for name, model in models.items()}
+    if cache is not None:
+        for name in models:
+            entry = cache.get(keys[name])
+            if entry is not None:
+                fitted[name] = (entry.model, entry.accuracy)
+                if job is not None:
+                    job.progress(name, entry.accuracy, len(fitted), len(models))
+
+    to_fit = {name: model for name, model in models.items() if name not in fitted}
+    processes, inner_jobs = plan_jobs(to_fit, n_jobs)
+    executor = get_reusable_executor(max_workers=processes)
+    pending = set()
+    for name, model in to_fit.items():
+        model = clone(model)
+        if supports_inner_jobs(model):
+            model.set_params(n_jobs=inner_jobs[name])
+        inputs = scaled if scaled is not None and needs_scaling(model) else (X_train, X_test)
+        pending.add(executor.submit(fit_and_score, name, model, *inputs, y_train, y_test, profile_stage))
+
+    for name, model, accuracy, predictions, fit_timings in completed(executor, pending, job):
+        fitted[name] = (model, accuracy)
+        if timings is not None:
+            timings.extend(fit_timings)
+        if cache is not None:
+            cache.put(keys[name], FittedModel(model, accuracy, predictions, y_test))
+        if job is not None:
+            job.progress(name, accuracy, len(fitted), len(models))
+    return {name: fitted[name] for name in models}
+
+
+def take(values, index):
+    """Rows index of values, or all of values when index is None."""
+    if index is None:
+        return values
+    return values.iloc[index] if hasattr(values, "iloc") else values[index]
+
+
+def cross_validate_models(models, X, y, folds=CV_FOLDS, n_jobs=None, job=None, prune_after=CV_PRUNE_AFTER,
+                          prune_margin=CV_PRUNE_MARGIN, random_state=RANDOM_STATE, scaled_X=None):
+    """k-fold cross-validate every model, running folds and models concurrently in worker processes.
+
+    X (and scaled_X, used for models that needs_scaling()) may be
+    SharedArrays; workers slice the folds out of them themselves.
+
+    Models are raced successive-halving style: every model runs its first
+    prune_after folds, then a model in the bottom half that is more than
+    prune_margin below the best mean accuracy is pruned and runs no more
+    folds. Survivors run the remaining folds.
+
+    Returns {model_name: CrossValidation(mean, std, scores, seconds, pruned)}
+    in the order of models, where scores and seconds are per fold. With a
+    BackgroundRunner job, job.progress(label, accuracy, done, total) is
+    reported as each fold finishes, total shrinking as models are pruned,
+    and cancelling the job stops the fits still running and raises
+    CancelledError.
+    """
+    splits = list(fold_splitter(y, folds, random_state).split(np.zeros(len(y)), y))
+
+    scores = {name: {} for name in models}
+    seconds = {name: {} for name in models}
+    pruned = set()
+    done = 0
+    first_rung = range(min(prune_after, folds))
+    for rung in (first_rung, range(len(first_rung), folds)):
+        tasks = {(name, fold): model for name, model in models.items() if name not in pruned for fold in rung}
+        if not tasks:
+            continue
+        total = done + len(tasks)
+        processes, inner_jobs = plan_jobs(tasks, n_jobs)
+        executor = get_reusable_executor(max_workers=processes)
+        pending = set()
+        for (name, fold), model in tasks.items():
+            model = clone(model)
+            if supports_inner_jobs(model):
+                model.set_params(n_jobs=inner_jobs[(name, fold)])
+            train, test = splits[fold]
+            model_X = scaled_X if scaled_X is not None and needs_scaling(model) else X
+            pending.add(executor.submit(score_fold, name, fold, model, model_X, y, train, test))
+
+        for name, fold, accuracy, fold_seconds in completed(executor, pending, job):
+            scores[name][fold] = accuracy
+            seconds[name][fold] = fold_seconds
+            done += 1
+            if job is not None:
+                job.progress(f"{name} fold {fold + 1}", accuracy, done, total)
+
+        if rung is first_rung and len(models) > 1:
+            means = {name: np.mean(list(fold_scores.values())) for name, fold_scores in scores.items()}
+            ranked = sorted(means, key=means.get, reverse=True)
+            best = means[ranked[0]]
+            pruned = {name for name in ranked[(len(ranked) + 1) // 2:] if means[name] < best - prune_margin}
+
+    results = {}
+    for name in models:
+        fold_scores = [scores[name][fold] for fold in sorted(scores[name])]
+        results[name] = CrossValidation(float(np.mean(fold_scores)), float(np.std(fold_scores)), fold_scores,
+                                        [seconds[name][fold] for fold in sorted(seconds[name])], name in pruned)
+    return results
+
+
+def score_trial(name, params, resource, model, X, y, rows, folds, random_state):
+    start = time.perf_counter()
+    X, y = take(resolve(X), rows), take(y, rows)
+    scores = cross_val_score(model, X, y, cv=fold_splitter(y, folds, random_state))
+    return name, params, resource, float(np.mean(scores)), time.perf_counter() - start
+
+
+def json_params(params):
+    # Sampled values are NumPy scalars, which neither JSON nor repr() round-trip cleanly
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in params.items()}
+
+
+def search_models(models, X, y, method="random", budget=SEARCH_BUDGET, time_limit=SEARCH_TIME_LIMIT,
+                  folds=SEARCH_FOLDS, eta=SEARCH_ETA, n_jobs=None, job=None, log=None,
+                  random_state=RANDOM_STATE, scaled_X=None):
+    """Tune every model with a SEARCH_SPACES entry, running trials concurrently in worker processes.
+
+    A trial scores one configuration by folds-fold cross-validation on X, y.
+    The budget of trials is shared between the models. "random" scores
+    budget / len(models) sampled configurations per model on all of X.
+    "halving" samples more configurations, scores them on a subsample, and
+    keeps the best 1 / eta of them for the next rung on eta times the rows
+    until the last rung uses all of X. X (and scaled_X, used for models that
+    needs_scaling()) may be SharedArrays.
+
+    After time_limit seconds no more trials start, the ones still running
+    are stopped by killing their worker processes, and the best
+    configurations found so far are returned. With a TrialLog, finished
+    trials are recorded as they complete and skipped when the same search
+    runs again, so an interrupted search resumes where it stopped.
+
+    Returns {model_name: SearchResult(best_params, best_score, trials,
+    finished)} for the models that have a search space. With a
+    BackgroundRunner job, job.progress(label, score, done, total) is
+    reported after every trial, and cancelling the job stops the trials
+    still running and raises CancelledError.
+    """
+    if method not in SEARCH_METHODS:
+        raise ValueError(f"Unknown search method {method!r}, expected one of {', '.join(SEARCH_METHODS)}")
+    models = {name: model for name, model in models.items() if type(model).__name__ in SEARCH_SPACES}
+    if not models:
+        return {}
+    deadline = time.monotonic() + time_limit if time_limit else None
+    per_model = max(1, budget // len(models))
+    rows_total = len(y)
+
+    if method == "random":
+        candidates, rungs = per_model, 1
+    else:
+        # n + n / eta + n / eta ** 2 + ... trials is about n * eta / (eta - 1)
+        candidates = max(eta, per_model * (eta - 1) // eta)
+        rungs = 1
+        while candidates // eta ** rungs >= 1 and rows_total // eta ** rungs >= folds * 20:
+            rungs += 1
+    order = np.random.default_rng(random_state).permutation(rows_total)
+
+    sampled = {name: [json_params(params) for params in
+                      ParameterSampler(SEARCH_SPACES[type(model).__name__], candidates, random_state=random_state)]
+               for name, model in models.items()}
+    scores = {name: {} for name in models}  # {name: {params repr: (params, score, resource)}}
+    trials = dict.fromkeys(models, 0)
+    survivors = {name: sampled[name] for name in models}
+    done = 0
+    total = sum(len(candidates) for candidates in sampled.values()) * (1 if rungs == 1 else 1 + 1 / (eta - 1))
+    timed_out = False
+
+    for rung in range(rungs):
+        resource = rows_total if rung == rungs - 1 else rows_total // eta ** (rungs - 1 - rung)
+        rows = None if resource == rows_total else order[:resource]
+        tasks = []
+        for name, candidates in survivors.items():
+            for params in candidates:
+                key = repr((model_key(clone(models[name]).set_params(**params)), resource, folds))
+                logged = log.get(key) if log is not None else None
+                if logged is not None:
+                    scores[name][repr(params)] = (params, logged["score"], resource)
+                    trials[name] += 1
+                    done += 1
+                else:
+                    tasks.append((name, params, key))
+
+        if tasks and not timed_out:
+            processes, inner_jobs = plan_jobs({index: models[name] for index, (name, params, key) in enumerate(tasks)},
+                                              n_jobs)
+            executor = get_reusable_executor(max_workers=processes)
+            keys = {(name, repr(params)): key for name, params, key in tasks}
+
+            def calls():
+                # Submitted lazily, so nothing new starts once the time limit is up; running trials are killed then
+                for index, (name, params, key) in enumerate(tasks):
+                    model = clone(models[name]).set_params(**params)
+                    if supports_inner_jobs(model):
+                        model.set_params(n_jobs=inner_jobs[index])
+                    model_X = scaled_X if scaled_X is not None and needs_scaling(model) else X
+                    yield score_trial, name, params, resource, model, model_X, y, rows, folds, random_state
+
+            for name, params, resource, score, seconds in completed(executor, (), job, calls(), processes, deadline):
+                scores[name][repr(params)] = (params, score, resource)
+                trials[name] += 1
+                done += 1
+                if log is not None:
+                    log.record(keys[(name, repr(params))], model=name, params=params, resource=resource,
+                               score=score, seconds=seconds)
+                if job is not None:
+                    job.progress(f"{name} trial {trials[name]}", score, done, max(done, round(total)))
+            timed_out = deadline is not None and time.monotonic() > deadline
+
+        if rung < rungs - 1:
+            # Keep the best 1 / eta of the configurations scored on this rung
+            for name, candidates in survivors.items():
+                ranked = sorted((scores[name][repr(params)] for params in candidates
+                                 if repr(params) in scores[name] and scores[name][repr(params)][2] == resource),
+                                key=lambda entry: entry[1], reverse=True)
+                survivors[name] = [entry[0] for entry in ranked[:max(1, len(ranked) // eta)]]
+
+    results = {}
+    for name in models:
+        # Prefer configurations scored on the most rows, then the best score
+        scored = list(scores[name].values())
+        if not scored:
+            continue
+        params, score, resource = max(scored, key=lambda entry: (entry[2], entry[1]))
+        results[name] = SearchResult(params, score, trials[name], not timed_out)
+    return results
+
+
+def streaming_models():
+    """partial_fit estimators for fit_streaming(), each paired with the scaler its input needs (or None)."""
+    return {
+        "SGD Linear SVM": (StandardScaler(), SGDClassifier(loss="hinge", random_state=RANDOM_STATE)),
+        "SGD Logistic Regression": (StandardScaler(), SGDClassifier(loss="log_loss", random_state=RANDOM_STATE)),
+        "Gaussian NB": (None, GaussianNB()),
+        # MultinomialNB needs non-negative features
+        "Multinomial NB": (MinMaxScaler(clip=True), MultinomialNB()),
+    }
+
+
+def iter_chunks(file_path, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield a CSV, Parquet or Feather file as DataFrames of about chunk_rows rows, never all at once."""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        yield from pd.read_csv(file_path, chunksize=chunk_rows)
+    elif extension == ".parquet":
+        import pyarrow.parquet
+
+        for batch in pyarrow.parquet.ParquetFile(file_path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    elif extension == ".feather":
+        import pyarrow.ipc
+
+        with pyarrow.ipc.open_file(file_path) as reader:
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).to_pandas()
+    else:
+        raise ValueError("Streaming needs a CSV, Parquet or Feather file")
+
+
+def held_out_mask(rows, chunk_index, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    # Seeded per chunk, so every pass over the file picks the same held-out rows
+    return np.random.default_rng((random_state, chunk_index)).random(rows) < test_size
+
+
+def fit_streaming(file_path, models=None, chunk_rows=STREAM_CHUNK_ROWS, test_size=TEST_SIZE,
+                  random_state=RANDOM_STATE, job=None):
+    """Train partial_fit models over a file chunk by chunk and score them on a held-out stream.
+
+    Memory is bounded by chunk_rows whatever the file size. Three passes are
+    made: the first collects the classes and fits the scalers, the second
+    trains every model on each chunk's training rows, and the third scores
+    them on the held-out rows. The last column is the target and the numeric
+    columns are the features; rows with missing values are skipped.
+
+    Returns {model_name: ((scaler, fitted_model), accuracy)}. With a
+    BackgroundRunner job, job.progress(stage, chunks, rows) is reported after
+    every chunk and cancelling the job raises CancelledError.
+    """
+    if models is None:
+        models = streaming_models()
+    models = {name: (None if scaler is None else clone(scaler), clone(model))
+              for name, (scaler, model) in models.items()}
+    scalers = [scaler for scaler, model in models.values() if scaler is not None]
+    target = features = None
+    classes = set()
+
+    def passes(stage):
+        rows = 0
+        for chunk_index, chunk in enumerate(iter_chunks(file_path, chunk_rows)):
+            if job is not None:
+                job.check_cancelled()
+            chunk = chunk[features + [target]].dropna()
+            test = held_out_mask(len(chunk), chunk_index, test_size, random_state)
+            yield chunk, test
+            rows += len(chunk)
+            if job is not None:
+                job.progress(stage, chunk_index + 1, rows)
+
+    def arrays(chunk):
+        X = chunk[features].to_numpy(dtype=np.float32)
+        y = pd.Categorical(chunk[target], categories=classes).codes
+        return X, y
+
+    for chunk in iter_chunks(file_path, chunk_rows):
+        target = chunk.columns[-1]
+        features = [column for column in chunk.columns[:-1] if pd.api.types.is_numeric_dtype(chunk[column])]
+        break
+    if not features:
+        raise ValueError("Streaming needs at least one numeric feature column")
+
+    for chunk, test in passes("Scanning"):
+        classes.update(chunk[target].unique())
+        X = chunk[features].to_numpy(dtype=np.float32)[~test]
+        if len(X):
+            for scaler in scalers:
+                scaler.partial_fit(X)
+    classes = sorted(classes)
+    labels = np.arange(len(classes))
+
+    for chunk, test in passes("Training"):
+        X, y = arrays(chunk)
+        if (~test).any():
+            for scaler, model in models.values():
+                X_train = X[~test] if scaler is None else scaler.transform(X[~test])
+                model.partial_fit(X_train, y[~test], classes=labels)
+
+    correct = dict.fromkeys(models, 0)
+    total = 0
+    for chunk, test in passes("Evaluating"):
+        X, y = arrays(chunk)
+        total += test.sum()
+        if test.any():
+            for name, (scaler, model) in models.items():
+                X_test = X[test] if scaler is None else scaler.transform(X[test])
+                correct[name] += (model.predict(X_test) == y[test]).sum()
+    if not total:
+        raise ValueError("No held-out rows to score the streaming models on")
+
+    return {name: (models[name], float(correct[name] / total)) for name in models}
+
+
+class ScoringPipeline:
+    """A fitted model bundled with the preprocessing it was trained behind, for predicting on raw rows.
+
+    predict() takes a DataFrame holding the training feature columns, in any
+    order and alongside any others, and applies what PreparedData did before
+    the model saw them: imputation and encoding, the float32 cast and, for
+    models that needs_scaling(), the StandardScaler. With classes, the
+    model's integer predictions are mapped back to the target's labels.
+    """
+
+    def __init__(self, preprocessor, scaler, model, name=None, classes=None):
+        self.preprocessor = preprocessor
+        self.scaler = scaler
+        self.model = model
+        self.name = name
+        self.classes = classes
+        self.columns = list(preprocessor.feature_names_in_)
+
+    def check_columns(self, X):
+        missing = [column for column in self.columns if column not in X.columns]
+        if missing:
+            raise ValueError(f"Missing feature column(s): {', '.join(map(str, missing))}")
+
+    def transform(self, X):
+        self.check_columns(X)
+        X = self.preprocessor.transform(X[self.columns]).astype(np.float32)
+        if self.scaler is not None:
+            X = self.scaler.transform(X.astype(np.float64))
+        return X
+
+    def predict(self, X):
+        predictions = self.model.predict(self.transform(X))
+        if self.classes is not None:
+            predictions = self.classes[predictions]
+        return predictions
+
+    def save(self, path):
+        joblib.dump(self, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def load(path):
+        pipeline = joblib.load(path)
+        if not isinstance(pipeline, ScoringPipeline):
+            raise ValueError(f"{path} is not an exported model")
+        return pipeline
+
+
+def export_pipeline(prepared, model, path, name=None):
+    """Save fitted model with prepared's preprocessing as a ScoringPipeline at path, and return it."""
+    pipeline = ScoringPipeline(prepared.preprocessor, prepared.scaler if needs_scaling(model) else None, model, name,
+                               prepared.classes)
+    pipeline.save(path)
+    return pipeline
+
+
+# Pipelines already loaded by this worker process, by (path, mtime)
+_scoring_pipelines = {}
+
+
+def score_chunk(pipeline_path, index, chunk):
+    key = (pipeline_path, os.stat(pipeline_path).st_mtime_ns)
+    pipeline = _scoring_pipelines.get(key)
+    if pipeline is None:
+        _scoring_pipelines.clear()
+        pipeline = _scoring_pipelines[key] = ScoringPipeline.load(pipeline_path)
+    return index, pipeline.predict(chunk)
+
+
+@contextlib.contextmanager
+def prediction_writer(output_path):
+    """A write(predictions) function appending to a CSV or Parquet file with a single prediction column."""
+    if output_path.lower().endswith(".parquet"):
+        import pyarrow
+        import pyarrow.parquet
+
+        writer = None
+
+        def write(predictions):
+            nonlocal writer
+            table = pyarrow.table({"prediction": predictions})
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(output_path, table.schema)
+            else:
+                # A chunk of only missing labels has no type of its own
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+
+        try:
+            yield write
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    with open(output_path, "w", newline="") as file:
+        header = True
+
+        def write(predictions):
+            nonlocal header
+            pd.DataFrame({"prediction": predictions}).to_csv(file, header=header, index=False)
+            header = False
+
+        yield write
+
+
+def score_file(pipeline_path, input_path, output_path, chunk_rows=SCORE_CHUNK_ROWS, n_jobs=None, job=None):
+    """Predict every row of a CSV, Parquet or Feather file with an exported ScoringPipeline.
+
+    The file is read in chunks of chunk_rows, which are scored across
+    worker processes, each loading the pipeline once. Predictions are
+    written to output_path (.csv or .parquet) in input order as soon as
+    they are ready, and at most two chunks per worker are in flight, so
+    memory stays flat however large the file is.
+
+    Returns {"rows", "seconds", "rows_per_second"}. With a BackgroundRunner
+    job, job.progress(rows) is reported as chunks are written, and
+    cancelling the job stops the workers and raises CancelledError.
+    """
+    start = time.perf_counter()
+    processes = worker_budget(n_jobs)
+    executor = get_reusable_executor(max_workers=processes)
+    calls = ((score_chunk, pipeline_path, index, chunk) for index, chunk in enumerate(iter_chunks(input_path, chunk_rows)))
+    # Chunks can finish out of order; hold early ones back until the chunks before them are written
+    finished = {}
+    next_index = 0
+    rows = 0
+    with prediction_writer(output_path) as write:
+        for index, predictions in completed(executor, (), job, calls, limit=2 * processes):
+            finished[index] = predictions
+            while next_index in finished:
+                predictions = finished.pop(next_index)
+                write(predictions)
+                rows += len(predictions)
+                next_index += 1
+            if job is not None:
+                job.progress(rows)
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or purge the on-disk model cache used by ml_app2.py.")
+    parser.add_argument("action", choices=["list", "purge"])
+    parser.add_argument("--dir", default=MODEL_STORE_DIR, help=f"cache directory (default: {MODEL_STORE_DIR})")
+    args = parser.parse_args(argv)
+
+    store = ModelStore(args.dir)
+    if args.action == "purge":
+        print(f"Removed {store.purge()} cached model(s) from {args.dir}.")
+        return
+
+    entries = store.entries()
+    for entry in entries:
+        last_used = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["last_used"]))
+        model = entry.get("model", "?").split("[", 1)[0]
+        accuracy = entry.get("accuracy")
+        accuracy = f"{accuracy * 100:6.2f}%" if accuracy is not None else "      ?"
+        print(f"{last_used}  {entry['bytes'] / 1024:10.1f} KB  {accuracy}  {model:<28} data {entry.get('data_key', '?')[:12]}")
+    print(f"{len(entries)} cached model(s), {sum(entry['bytes'] for entry in entries) / (1024 * 1024):.1f} MB in {args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import math
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.colors import LogNorm
+
+from ml_engine import RANDOM_STATE
+
+VISUALIZATIONS = ["Correlation Heatmap", "Bar Plot", "Scatter Plot", "Histogram", "Pie Chart"]
+
+# Rows kept by reservoir_sample() for files too large to load
+PLOT_SAMPLE_ROWS = 100000
+
+# Above this many rows a scatter plot is drawn as a 2D density instead of points
+SCATTER_POINTS = 20000
+
+HISTOGRAM_BINS = 20
+DENSITY_BINS = 100
+
+# Pie charts show this many categories and lump the rest into "Other"
+PIE_SLICES = 10
+
+# Heatmap cells are only annotated up to this many columns
+ANNOTATE_COLUMNS = 15
+
+
+def reservoir_sample(chunks, size=PLOT_SAMPLE_ROWS, random_state=RANDOM_STATE):
+    """Uniform random sample of up to size rows from an iterable of DataFrames, in one pass.
+
+    Vectorized reservoir sampling (Algorithm R): row i of the stream replaces
+    a random reservoir slot with probability size / (i + 1), so memory stays
+    at size rows plus one chunk however long the stream is.
+    """
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        fill = size - (0 if reservoir is None else len(reservoir))
+        if fill > 0:
+            head = chunk.iloc[:fill]
+            reservoir = head if reservoir is None else pd.concat([reservoir, head], ignore_index=True)
+            reservoir = reservoir.reset_index(drop=True)
+            seen += len(head)
+            chunk = chunk.iloc[fill:]
+        if len(chunk):
+            slots = rng.integers(0, seen + np.arange(1, len(chunk) + 1))
+            keep = slots < size
+            slots, picked = slots[keep], chunk[keep]
+            # A slot drawn twice ends up with the later row, as in the sequential algorithm
+            last = len(slots) - 1 - np.unique(slots[::-1], return_index=True)[1]
+            reservoir = pd.concat([reservoir.drop(index=slots[last]), picked.iloc[last]], ignore_index=True)
+            seen += len(chunk)
+    if reservoir is None:
+        raise ValueError("Cannot sample an empty file")
+    return reservoir
+
+
+def finite(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.isfinite(values)]
+
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """(counts, edges) of the finite values, in one NumPy pass."""
+    return np.histogram(finite(values), bins=bins)
+
+
+def density(x, y, bins=DENSITY_BINS):
+    """(counts, x_edges, y_edges) of the rows where both x and y are finite."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    both = np.isfinite(x) & np.isfinite(y)
+    return np.histogram2d(x[both], y[both], bins=bins)
+
+
+def aggregate(data, visualization):
+    """Everything a visualization draws, reduced to sizes that don't grow with the row count.
+
+    Runs off the Tk thread; render() only has to draw the result.
+    """
+    numeric_cols = data.select_dtypes(include=['number']).columns
+
+    if visualization == "Correlation Heatmap":
+        return data[numeric_cols].corr()
+
+    elif visualization == "Bar Plot":
+        return {col: data[col].value_counts().head(10) for col in numeric_cols[:1]}
+
+    elif visualization == "Scatter Plot" and len(numeric_cols) > 1:
+        x_col, y_col = numeric_cols[0], numeric_cols[1]
+        if len(data) <= SCATTER_POINTS:
+            return x_col, y_col, "points", data[[x_col, y_col]]
+        return x_col, y_col, "density", density(data[x_col], data[y_col])
+
+    elif visualization == "Histogram":
+        return {col: histogram(data[col]) for col in numeric_cols}
+
+    elif visualization == "Pie Chart":
+        categorical_cols = data.select_dtypes(include=['object', 'category']).columns
+        pies = {}
+        for col in categorical_cols[:1]:
+            counts = data[col].value_counts()
+            if len(counts) > PIE_SLICES:
+                counts = pd.concat([counts.head(PIE_SLICES), pd.Series({"Other": counts.iloc[PIE_SLICES:].sum()})])
+            pies[col] = counts
+        return pies
+
+
+def render(visualization, prepared):
+    """Draw the figure for aggregate()'s result, without showing it."""
+    if visualization == "Correlation Heatmap":
+        plt.figure(figsize=(10, 6))
+        sns.heatmap(prepared, annot=len(prepared) <= ANNOTATE_COLUMNS, cmap="coolwarm")
+        plt.title("Correlation Heatmap")
+
+    elif visualization == "Bar Plot":
+        for col, counts in prepared.items():
+            plt.figure(figsize=(8, 6))
+            counts.plot(kind='bar', color='skyblue', title=f"Bar Graph for {col}")
+            plt.xlabel(col)
+            plt.ylabel("Count")
+
+    elif visualization == "Scatter Plot" and prepared is not None:
+        x_col, y_col, kind, values = prepared
+        plt.figure(figsize=(8, 6))
+        if kind == "points":
+            sns.scatterplot(data=values, x=x_col, y=y_col)
+            plt.title(f"Scatter Plot: {x_col} vs {y_col}")
+        else:
+            counts, x_edges, y_edges = values
+            mesh = plt.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts, 0).T, norm=LogNorm(), cmap="viridis")
+            plt.colorbar(mesh, label="Rows")
+            plt.title(f"Density Plot: {x_col} vs {y_col}")
+        plt.xlabel(x_col)
+        plt.ylabel(y_col)
+
+    elif visualization == "Histogram" and prepared:
+        # One grid figure for every column rather than a window each
+        columns = math.ceil(math.sqrt(len(prepared)))
+        rows = math.ceil(len(prepared) / columns)
+        figure, axes = plt.subplots(rows, columns, figsize=(4 * columns, 3 * rows), squeeze=False)
+        for ax, (col, (counts, edges)) in zip(axes.flat, prepared.items()):
+            ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", color='orange')
+            ax.set_title(f"Histogram for {col}")
+            ax.set_xlabel(col)
+            ax.set_ylabel("Frequency")
+        for ax in axes.flat[len(prepared):]:
+            ax.set_visible(False)
+        figure.tight_layout()
+
+    elif visualization == "Pie Chart":
+        for col, counts in prepared.items():
+            plt.figure(figsize=(8, 6))
+            counts.plot(kind='pie', autopct='%1.1f%%', title=f"Pie Chart for {col}")
+            plt.ylabel('')
@@ -0,0 +1,174 @@
+import argparse
+import concurrent.futures
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from ml_engine import SCORE_CHUNK_ROWS, ScoringPipeline, score_file
+
+# Micro-batching: requests arriving within MAX_WAIT_MS of the first one are
+# predicted together in one call, up to MAX_BATCH_ROWS rows
+MAX_BATCH_ROWS = 4096
+MAX_WAIT_MS = 5
+
+
+class MicroBatcher:
+    """Collect concurrent prediction requests into batches scored by one thread.
+
+    predict() is called from the HTTP server's request threads and blocks
+    until its rows have been scored. The batching thread waits up to
+    max_wait_ms after the first request of a batch for more to arrive, so
+    many small requests cost one vectorized predict instead of one each.
+    """
+
+    def __init__(self, pipeline, max_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+        self.pipeline = pipeline
+        self.max_rows = max_rows
+        self.max_wait = max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def predict(self, frame):
+        # Rejected here rather than in the batch, where it would fail every request batched with it
+        self.pipeline.check_columns(frame)
+        future = concurrent.futures.Future()
+        self.requests.put((frame, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                rows += len(request[0])
+
+            try:
+                predictions = self.pipeline.predict(pd.concat([frame for frame, _ in batch], ignore_index=True))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for frame, future in batch:
+                future.set_result(predictions[offset:offset + len(frame)].tolist())
+                offset += len(frame)
+            with self.lock:
+                self.stats["requests"] += len(batch)
+                self.stats["batches"] += 1
+                self.stats["rows"] += rows
+
+
+class PredictionServer(ThreadingHTTPServer):
+    # The default backlog of 5 resets connections under the bursts micro-batching is for
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def make_handler(batcher):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def send_json(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self.send_json(200, {"status": "ok", "model": batcher.pipeline.name, "columns": batcher.pipeline.columns})
+            elif self.path == "/stats":
+                with batcher.lock:
+                    self.send_json(200, dict(batcher.stats))
+            else:
+                self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self.send_json(404, {"error": "not found"})
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                frame = pd.DataFrame.from_records(body["rows"])
+            except (ValueError, KeyError, TypeError) as e:
+                self.send_json(400, {"error": f"expected {{\"rows\": [{{column: value, ...}}, ...]}}: {e}"})
+                return
+            if frame.empty:
+                self.send_json(200, {"predictions": []})
+                return
+            try:
+                self.send_json(200, {"predictions": batcher.predict(frame)})
+            except Exception as e:
+                self.send_json(400, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass  # One line per request would swamp the console under load
+
+    return PredictionHandler
+
+
+def serve(pipeline_path, host="127.0.0.1", port=8000, max_rows=MAX_BATCH_ROWS, max_wait_ms=MAX_WAIT_MS):
+    batcher = MicroBatcher(ScoringPipeline.load(pipeline_path), max_rows, max_wait_ms)
+    server = PredictionServer((host, port), make_handler(batcher))
+    print(f"Serving {batcher.pipeline.name or pipeline_path} on http://{host}:{server.server_port} "
+          f"(POST /predict, GET /health, GET /stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Score data with a model exported from ml_app2.py.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score = commands.add_parser("score", help="predict every row of a file, in chunks across worker processes")
+    score.add_argument("pipeline", help="exported model (.joblib)")
+    score.add_argument("input", help="CSV, Parquet or Feather file to score")
+    score.add_argument("output", help="where to write the predictions, .csv or .parquet")
+    score.add_argument("--chunk-rows", type=int, default=SCORE_CHUNK_ROWS,
+                       help=f"rows scored per chunk (default: {SCORE_CHUNK_ROWS})")
+    score.add_argument("--n-jobs", type=int, help="worker processes (default: one per core)")
+
+    http = commands.add_parser("serve", help="answer prediction requests over local HTTP")
+    http.add_argument("pipeline", help="exported model (.joblib)")
+    http.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    http.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    http.add_argument("--max-batch-rows", type=int, default=MAX_BATCH_ROWS,
+                      help=f"most rows predicted in one batch (default: {MAX_BATCH_ROWS})")
+    http.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                      help=f"how long a batch waits for more requests (default: {MAX_WAIT_MS})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        serve(args.pipeline, args.host, args.port, args.max_batch_rows, args.max_wait_ms)
+        return
+
+    report = score_file(args.pipeline, args.input, args.output, args.chunk_rows, args.n_jobs)
+    print(f"Scored {report['rows']:,} rows of {os.path.basename(args.input)} in {report['seconds']:.1f} s "
+          f"({report['rows_per_second']:,.0f} rows/s); predictions saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
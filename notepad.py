@@ -1,18 +1,217 @@
+import mmap
+import os
+import re
+import shutil
+import time
 import tkinter as tk
+import tkinter.font
+from array import array
 from tkinter import filedialog, messagebox
 
+# Files at least this big open read-only in large-file mode: memory-mapped
+# and shown a screenful at a time instead of loaded into the text widget
+LARGE_FILE_BYTES = 32 * 1024 * 1024
+
+# The large-file index keeps the offset of every INDEX_STRIDE-th line, and
+# scans the file for INDEX_SLICE_SECONDS at a time between Tk events
+INDEX_STRIDE = 64
+INDEX_SLICE_SECONDS = 0.05
+STRIDE_PATTERN = re.compile(rb"(?:[^\n]*\n){%d}" % INDEX_STRIDE)
+
+# At most this much of a line is shown, so a huge single line is never read
+# whole; the last lines are counted COUNT_SLICE_BYTES at a time for the same reason
+MAX_LINE_BYTES = 10000
+COUNT_SLICE_BYTES = 1024 * 1024
+
+
+class LargeFile:
+    """Read-only, memory-mapped view of a file with a sparse index of its line offsets.
+
+    offsets is a compact array holding the byte offset of line 0,
+    INDEX_STRIDE, 2 * INDEX_STRIDE, ...; any other line is found by scanning
+    forward from the checkpoint before it. index_some() extends the index a
+    slice at a time, so the start of the file can be shown straight away.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = array("Q", [0])
+        self.line_count = None  # Known once the whole file has been indexed
+
+    def index_some(self, seconds=INDEX_SLICE_SECONDS):
+        """Extend the index for about seconds, and return whether it is complete."""
+        deadline = time.monotonic() + seconds
+        while self.line_count is None and time.monotonic() < deadline:
+            for _ in range(1000):
+                # One regex match steps over INDEX_STRIDE lines in C
+                match = STRIDE_PATTERN.match(self.map, self.offsets[-1])
+                if match is None:
+                    self.line_count = (len(self.offsets) - 1) * INDEX_STRIDE + self.count_tail_lines(self.offsets[-1])
+                    break
+                self.offsets.append(match.end())
+        return self.line_count is not None
+
+    def count_tail_lines(self, start):
+        newlines = sum(self.map[position:position + COUNT_SLICE_BYTES].count(b"\n")
+                       for position in range(start, self.size, COUNT_SLICE_BYTES))
+        # A last line without a newline still counts
+        return newlines + (1 if self.size > start and self.map[self.size - 1] != ord("\n") else 0)
+
+    def indexed_lines(self):
+        return self.line_count if self.line_count is not None else (len(self.offsets) - 1) * INDEX_STRIDE
+
+    def estimated_lines(self):
+        # Until indexing finishes, assume the rest of the file has the same line density
+        if self.line_count is not None or self.offsets[-1] == 0:
+            return self.indexed_lines()
+        return max(self.indexed_lines(), self.indexed_lines() * self.size // self.offsets[-1])
+
+    def lines(self, first, count):
+        if first // INDEX_STRIDE >= len(self.offsets):
+            return []
+        position = self.offsets[first // INDEX_STRIDE]
+        for _ in range(first % INDEX_STRIDE):
+            position = self.map.find(b"\n", position)
+            if position < 0:
+                return []
+            position += 1
+        lines = []
+        while len(lines) < count and position < self.size:
+            end = self.map.find(b"\n", position)
+            if end < 0:
+                end = self.size
+            line = self.map[position:min(end, position + MAX_LINE_BYTES)].decode("utf-8", errors="replace")
+            if end - position > MAX_LINE_BYTES:
+                line += f" ... [{end - position - MAX_LINE_BYTES:,} more bytes]"
+            lines.append(line.rstrip("\r"))
+            position = end + 1
+        return lines
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# The open LargeFile, and the first line shown, while in large-file mode
+large_file = None
+top_line = 0
+
+def close_large_file():
+    global large_file
+    if large_file is not None:
+        large_file.close()
+        large_file = None
+        scrollbar.pack_forget()
+        # Cleared while undo is still off, so Ctrl+Z can't bring the large file's text back
+        text_area.config(state="normal", wrap="word")
+        text_area.delete(1.0, tk.END)
+        text_area.config(undo=True)
+        text_area.edit_reset()
+
 def new_file():
+    close_large_file()
     text_area.delete(1.0, tk.END)
     root.title("Untitled - Notepad")
 
+def open_large_file(file_path):
+    global large_file, top_line
+    close_large_file()
+    large_file = LargeFile(file_path)
+    top_line = 0
+    # Lines aren't wrapped, so each text row is one file line. Undo is off while
+    # scrolling rewrites the widget, so the undo stack doesn't grow with every step
+    text_area.config(wrap="none", undo=False)
+    text_area.edit_reset()
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y, before=text_area)
+    show_window()
+    root.after(1, index_step, large_file)
+
+def index_step(indexing):
+    # Index a slice between Tk events until done, unless another file has been opened since
+    if indexing is not large_file:
+        return
+    done = indexing.index_some()
+    status = "" if done else f" (indexing {indexing.offsets[-1] * 100 // indexing.size}%)"
+    root.title(f"{indexing.path} - Notepad [large file, read-only]{status}")
+    update_scrollbar()
+    if not done:
+        root.after(1, index_step, indexing)
+
+def visible_rows():
+    return max(1, text_area.winfo_height() // text_font.metrics("linespace"))
+
+def show_window():
+    # Only the lines on screen are ever in the text widget
+    rows = visible_rows()
+    text_area.config(state="normal")
+    text_area.delete(1.0, tk.END)
+    text_area.insert(1.0, "\n".join(large_file.lines(top_line, rows)))
+    text_area.config(state="disabled")
+    update_scrollbar()
+
+def update_scrollbar():
+    total = max(1, large_file.estimated_lines())
+    scrollbar.set(top_line / total, min(1.0, (top_line + visible_rows()) / total))
+
+def scroll_to(line):
+    global top_line
+    # Scrolling is limited to the lines indexed so far
+    last = max(0, large_file.indexed_lines() - visible_rows())
+    line = max(0, min(int(line), last))
+    if line != top_line:
+        top_line = line
+        show_window()
+
+def on_scrollbar(action, amount, unit=None):
+    if large_file is None:
+        return
+    if action == "moveto":
+        scroll_to(float(amount) * large_file.estimated_lines())
+    else:
+        step = visible_rows() if unit == "pages" else 1
+        scroll_to(top_line + int(amount) * step)
+
+def on_large_file_key(event):
+    if large_file is None:
+        return None
+    steps = {"Up": -1, "Down": 1, "Prior": -visible_rows(), "Next": visible_rows()}
+    if event.keysym in steps:
+        scroll_to(top_line + steps[event.keysym])
+    elif event.keysym == "Home":
+        scroll_to(0)
+    elif event.keysym == "End":
+        scroll_to(large_file.indexed_lines())
+    return "break"
+
+def on_large_file_wheel(event):
+    if large_file is None:
+        return None
+    if event.num == 4 or getattr(event, "delta", 0) > 0:
+        scroll_to(top_line - 3)
+    else:
+        scroll_to(top_line + 3)
+    return "break"
+
+def on_resize(event):
+    if large_file is not None:
+        show_window()
+
 def open_file():
     file_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text Documents", "*.txt"),
                                                                                  ("All Files", "*.*")])
     if file_path:
         try:
+            if os.path.getsize(file_path) >= LARGE_FILE_BYTES:
+                open_large_file(file_path)
+                return
             with open(file_path, "r") as file:
-                text_area.delete(1.0, tk.END)
-                text_area.insert(1.0, file.read())
+                contents = file.read()
+            close_large_file()
+            text_area.delete(1.0, tk.END)
+            text_area.insert(1.0, contents)
             root.title(f"{file_path} - Notepad")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open file: {e}")
@@ -22,6 +221,11 @@ def save_file():
                                                                                   ("All Files", "*.*")])
     if file_path:
         try:
+            if large_file is not None:
+                # The view is read-only, so saving is a copy, streamed rather than read into memory
+                if not (os.path.exists(file_path) and os.path.samefile(file_path, large_file.path)):
+                    shutil.copyfile(large_file.path, file_path)
+                return
             with open(file_path, "w") as file:
                 file.write(text_area.get(1.0, tk.END))
             root.title(f"{file_path} - Notepad")
@@ -48,6 +252,15 @@ root.geometry("800x600")
 # Text area
 text_area = tk.Text(root, wrap="word", undo=True)
 text_area.pack(expand=True, fill=tk.BOTH)
+text_font = tkinter.font.Font(font=text_area["font"])
+
+# Scrollbar for large-file mode, which scrolls the file rather than the text widget
+scrollbar = tk.Scrollbar(root, command=on_scrollbar)
+for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>", "<Control-Home>", "<Control-End>"):
+    text_area.bind(sequence, on_large_file_key)
+for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+    text_area.bind(sequence, on_large_file_wheel)
+text_area.bind("<Configure>", on_resize)
 
 # Menu bar
 menu_bar = tk.Menu(root)
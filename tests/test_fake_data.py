@@ -0,0 +1,119 @@
+import os
+import sqlite3
+
+import pytest
+
+import fake_data
+
+
+def count_users(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_sqlite_sink_commits_every_n_batches(tmp_path):
+    path = str(tmp_path / "users.db")
+    sink = fake_data.DatabaseSink(fake_data.connect_sqlite(path), fake_data.sqlite_insert_query, commit_every=3,
+                                  sqlite=True)
+    records = list(fake_data.generate_records(50, seed=1))
+
+    # Another connection only sees rows once a commit has happened
+    visible = []
+    for batch in fake_data.batched(records, 7):
+        sink.write(batch)
+        visible.append(count_users(path))
+    sink.close()
+
+    assert visible == [0, 0, 21, 21, 21, 42, 42, 42]
+    assert sink.batches == 8
+    assert sink.rows == 50
+    assert count_users(path) == 50
+
+
+def test_sqlite_rows_written_from_command_line(tmp_path):
+    path = str(tmp_path / "users.db")
+    fake_data.main(["--sqlite", path, "--rows", "25", "--batch-size", "10", "--commit-every", "2", "--seed", "3"])
+
+    connection = sqlite3.connect(path)
+    rows = connection.execute(f"SELECT {', '.join(fake_data.USER_COLUMNS)} FROM users ORDER BY id").fetchall()
+    connection.close()
+    assert rows == list(fake_data.generate_records(25, seed=3))
+
+
+def test_unseeded_workers_generate_distinct_records():
+    names = [record[0] for record in fake_data.parallel_records(30, 3, seed=None, batch_size=1)]
+    assert len(names) == 30
+    # Three workers sharing one random state would produce every name three times
+    assert len(set(names)) > 10
+
+
+def indexes(path):
+    connection = sqlite3.connect(path)
+    try:
+        return {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'")
+                if not row[0].startswith("sqlite_")}
+    finally:
+        connection.close()
+
+
+def test_email_index_is_opt_in(tmp_path):
+    plain = str(tmp_path / "plain.db")
+    indexed = str(tmp_path / "indexed.db")
+    fake_data.main(["--sqlite", plain, "--rows", "5"])
+    fake_data.main(["--sqlite", indexed, "--rows", "5", "--email-index"])
+    assert indexes(plain) == set()
+    assert indexes(indexed) == set(fake_data.user_indexes)
+
+
+def luhn_valid(number):
+    total = 0
+    for position, digit in enumerate(int(c) for c in reversed(number)):
+        if position % 2:
+            digit = digit * 2 - 9 if digit > 4 else digit * 2
+        total += digit
+    return total % 10 == 0
+
+
+def test_luhn_check_digits_match_known_numbers():
+    import numpy as np
+
+    payloads = ["411111111111111", "555555555555444", "7992739871"]
+    expected = [1, 4, 3]
+    for payload, check in zip(payloads, expected):
+        digits = np.array([[int(c) for c in payload]])
+        assert fake_data.luhn_check_digits(digits).tolist() == [check]
+
+
+def test_vectorized_card_numbers_and_ssns_are_well_formed():
+    records = list(fake_data.vectorized_records(2000, seed=5, chunk_rows=300, pool_size=50))
+    assert len(records) == 2000
+    column = fake_data.USER_COLUMNS.index
+    for record in records:
+        card = record[column("credit_card_number")]
+        assert len(card) == 16 and card.isdigit() and luhn_valid(card)
+        assert card[0] == "4" or "51" <= card[:2] <= "55"
+
+        area, group, serial = record[column("ssn")].split("-")
+        assert len(area) == 3 and len(group) == 2 and len(serial) == 4
+        assert area not in ("000", "666") and not area.startswith("9")
+        assert group != "00" and serial != "0000"
+
+        phone = record[column("phone_number")].split("-")
+        assert [len(part) for part in phone] == [3, 3, 4]
+        assert phone[0][0] >= "2" and phone[1][0] >= "2"
+
+
+def test_failing_worker_raises_instead_of_hanging():
+    with pytest.raises(RuntimeError, match="KeyError"):
+        list(fake_data.parallel_records(10, 2, seed=1, engine="missing"))
+
+
+def test_dead_worker_raises_instead_of_hanging(monkeypatch):
+    # Forked workers inherit the patched engine table
+    monkeypatch.setitem(fake_data.ENGINES, "crash", lambda count, seed: os._exit(3))
+    monkeypatch.setattr(fake_data, "WORKER_POLL_SECONDS", 0.1)
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        list(fake_data.parallel_records(10, 2, seed=1, engine="crash"))
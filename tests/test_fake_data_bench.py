@@ -0,0 +1,18 @@
+import pytest
+
+import fake_data_bench
+
+
+def test_failing_case_is_reported_instead_of_hanging():
+    case = {"stage": "generate", "rows": 10, "engine": "missing", "seed": 0}
+    result = fake_data_bench.benchmark(case)
+    assert result["error"].startswith("KeyError")
+    assert "rows_per_second" not in result
+
+
+def test_main_exits_with_an_error_when_a_case_fails(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(fake_data_bench, "benchmark", lambda case, pool=None: {**case, "error": "boom"})
+    output = str(tmp_path / "bench.json")
+    with pytest.raises(SystemExit, match="2 benchmark case"):
+        fake_data_bench.main(["--rows", "10", "--batch-sizes", "5", "--engines", "faker", "--output", output])
+    assert capsys.readouterr().out.count("FAILED (boom)") == 2
@@ -0,0 +1,181 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import ip_finder
+
+
+def write_hosts(tmp_path):
+    path = tmp_path / "hosts"
+    path.write_text("10.0.0.1 alpha.test alpha\n"
+                    "10.0.0.2 beta.test  # second host\n"
+                    "\n"
+                    "10.0.0.3 slow.test\n")
+    return str(path)
+
+
+def delayed(resolver, delays):
+    """Wrap resolver so each listed hostname takes its delay in seconds (None hangs forever)."""
+    hang = threading.Event()
+
+    def resolve(hostname):
+        if hostname in delays:
+            delay = delays[hostname]
+            if delay is None:
+                hang.wait()
+            else:
+                time.sleep(delay)
+        return resolver(hostname)
+
+    return resolve
+
+
+def test_hosts_file_resolver_answers_and_fails_like_dns(tmp_path):
+    results = list(ip_finder.resolve_many(["ALPHA.test", "beta.test", "missing.test"],
+                                          resolver=ip_finder.hosts_file_resolver(write_hosts(tmp_path))))
+    answers = {hostname: (ip, error) for hostname, ip, error in results}
+    assert answers["ALPHA.test"] == ("10.0.0.1", None)
+    assert answers["beta.test"] == ("10.0.0.2", None)
+    assert answers["missing.test"][0] is None
+    assert "not known" in answers["missing.test"][1]
+
+
+def test_results_stream_in_completion_order(tmp_path):
+    resolver = delayed(ip_finder.hosts_file_resolver(write_hosts(tmp_path)), {"slow.test": 0.3})
+    results = ip_finder.resolve_many(["slow.test", "alpha", "beta.test"], workers=3, resolver=resolver)
+
+    # The fast lookups are yielded while the slow one is still running
+    started = time.monotonic()
+    first = [next(results)[0], next(results)[0]]
+    assert sorted(first) == ["alpha", "beta.test"]
+    assert time.monotonic() - started < 0.25
+    assert next(results) == ("slow.test", "10.0.0.3", None)
+    assert list(results) == []
+
+
+def test_hanging_lookup_is_reported_as_timed_out(tmp_path):
+    resolver = delayed(ip_finder.hosts_file_resolver(write_hosts(tmp_path)), {"slow.test": None})
+    started = time.monotonic()
+    results = list(ip_finder.resolve_many(["slow.test", "alpha"], workers=2, timeout=0.2, resolver=resolver))
+
+    assert results == [("alpha", "10.0.0.1", None), ("slow.test", None, "timed out")]
+    assert time.monotonic() - started < 1
+
+
+def test_stop_event_stops_new_lookups(tmp_path):
+    stop_event = threading.Event()
+    resolver = ip_finder.hosts_file_resolver(write_hosts(tmp_path))
+    hostnames = ["alpha", "beta.test", "slow.test", "alpha.test"]
+
+    results = []
+    for result in ip_finder.resolve_many(hostnames, workers=1, resolver=resolver, stop_event=stop_event):
+        results.append(result)
+        stop_event.set()
+    assert results == [("alpha", "10.0.0.1", None)]
+
+
+def test_hanging_resolver_never_grows_the_pool(tmp_path):
+    resolver = delayed(ip_finder.hosts_file_resolver(write_hosts(tmp_path)), {"slow.test": None})
+    before = threading.active_count()
+
+    peak = before
+    results = []
+    for result in ip_finder.resolve_many(["slow.test"] * 40, workers=4, timeout=0.05, resolver=resolver):
+        results.append(result)
+        peak = max(peak, threading.active_count())
+
+    assert results == [("slow.test", None, "timed out")] * 40
+    assert peak - before <= 4
+
+
+def counting(resolver):
+    """Wrap resolver so every call is recorded in resolve.calls."""
+    def resolve(hostname):
+        resolve.calls.append(hostname)
+        return resolver(hostname)
+
+    resolve.calls = []
+    return resolve
+
+
+def test_cache_answers_until_the_ttl_expires(tmp_path):
+    resolver = counting(ip_finder.hosts_file_resolver(write_hosts(tmp_path)))
+    cache = ip_finder.DNSCache(resolver, ttl=0.2)
+
+    assert cache.resolve("alpha") == "10.0.0.1"
+    assert cache.resolve("ALPHA") == "10.0.0.1"
+    assert resolver.calls == ["alpha"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    time.sleep(0.25)
+    assert cache.resolve("alpha") == "10.0.0.1"
+    assert resolver.calls == ["alpha", "alpha"]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_failures_are_cached_for_the_negative_ttl(tmp_path):
+    resolver = counting(ip_finder.hosts_file_resolver(write_hosts(tmp_path)))
+    cache = ip_finder.DNSCache(resolver, ttl=60, negative_ttl=0.2)
+
+    for _ in range(2):
+        with pytest.raises(socket.gaierror, match="not known"):
+            cache.resolve("missing.test")
+    assert resolver.calls == ["missing.test"]
+    assert cache.hits == 1
+
+    time.sleep(0.25)
+    with pytest.raises(socket.gaierror):
+        cache.resolve("missing.test")
+    assert resolver.calls == ["missing.test", "missing.test"]
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    resolver = counting(ip_finder.hosts_file_resolver(write_hosts(tmp_path)))
+    cache = ip_finder.DNSCache(resolver, max_entries=2)
+
+    cache.resolve("alpha")
+    cache.resolve("beta.test")
+    cache.resolve("alpha")  # beta.test is now the least recently used
+    cache.resolve("slow.test")
+
+    assert list(cache.entries) == ["alpha", "slow.test"]
+    cache.resolve("alpha")
+    cache.resolve("beta.test")
+    assert resolver.calls == ["alpha", "beta.test", "slow.test", "beta.test"]
+
+
+def test_cache_reloads_from_sqlite(tmp_path):
+    path = str(tmp_path / "cache.db")
+    resolver = counting(ip_finder.hosts_file_resolver(write_hosts(tmp_path)))
+    cache = ip_finder.DNSCache(resolver, path=path, commit_every=100)
+    cache.resolve("alpha")
+    with pytest.raises(socket.gaierror):
+        cache.resolve("missing.test")
+    cache.close()
+
+    warm = ip_finder.DNSCache(resolver, path=path)
+    assert warm.resolve("alpha") == "10.0.0.1"
+    with pytest.raises(socket.gaierror):
+        warm.resolve("missing.test")
+    assert resolver.calls == ["alpha", "missing.test"]
+    assert (warm.hits, warm.misses) == (2, 0)
+    warm.close()
+
+    # Expired entries are dropped when the file is loaded
+    expired = ip_finder.DNSCache(resolver, path=path, ttl=0)
+    expired.resolve("beta.test")
+    expired.close()
+    assert "beta.test" not in ip_finder.DNSCache(resolver, path=path).entries
+
+
+def test_resolve_many_answers_fresh_entries_from_the_cache(tmp_path):
+    resolver = counting(ip_finder.hosts_file_resolver(write_hosts(tmp_path)))
+    cache = ip_finder.DNSCache(resolver)
+    first = list(ip_finder.resolve_many(["alpha", "missing.test"], cache=cache))
+    second = list(ip_finder.resolve_many(["alpha", "missing.test"], cache=cache))
+
+    assert sorted(first) == sorted(second)
+    assert sorted(resolver.calls) == ["alpha", "missing.test"]
+    assert cache.stats() == "Cache: 2 hits, 2 misses, 2 entries"
@@ -0,0 +1,187 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import ml_engine
+
+
+def test_category_plan_survives_a_chunk_with_only_missing_values(tmp_path):
+    path = tmp_path / "data.csv"
+    rows = 300
+    pd.DataFrame({
+        "x": np.arange(rows),
+        "city": ["a", "b"] * 50 + [None] * 100 + ["5", "b"] * 50,
+        "label": ["p", "q"] * 150,
+    }).to_csv(path, index=False)
+
+    data, report = ml_engine.load_dataset(str(path), chunk_rows=100)
+
+    assert isinstance(data["city"].dtype, pd.CategoricalDtype)
+    assert sorted(data["city"].cat.categories) == ["5", "a", "b"]
+    assert data["city"].isna().sum() == 100
+    assert len(data) == rows
+
+
+def test_exported_pipeline_predicts_the_original_labels(tmp_path):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=400)
+    data = pd.DataFrame({"x": x, "colour": rng.choice(["red", "blue"], size=400),
+                         "label": np.where(x > 0, "high", "low")})
+    prepared = ml_engine.prepare_data(data)
+    try:
+        model, accuracy = ml_engine.fit_models({"Tree": ml_engine.DecisionTreeClassifier(random_state=0)},
+                                               *prepared.split(), n_jobs=1, scaled=prepared.scaled())["Tree"]
+        path = str(tmp_path / "tree.joblib")
+        ml_engine.export_pipeline(prepared, model, path, name="Tree")
+    finally:
+        prepared.close()
+
+    pipeline = ml_engine.ScoringPipeline.load(path)
+    predictions = pipeline.predict(data.drop(columns="label").head(50))
+    assert set(predictions) <= {"high", "low"}
+    assert (predictions == data["label"].head(50).to_numpy()).mean() > 0.9
+
+
+def test_boolean_columns_are_preprocessed_as_numbers(tmp_path):
+    rows = 200
+    flag = np.arange(rows) % 2 == 0
+    prepared = ml_engine.prepare_data(pd.DataFrame({"x": np.arange(rows, dtype=float), "flag": flag,
+                                                    "label": np.arange(rows) % 3}))
+    prepared.close()
+
+    # A loaded file keeps True/False as bool next to a categorical column
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"flag": flag, "colour": np.array(["red", "green", "blue"])[np.arange(rows) % 3],
+                  "label": np.where(flag, "yes", "no")}).to_csv(path, index=False)
+    data, report = ml_engine.load_dataset(str(path))
+    assert pd.api.types.is_bool_dtype(data["flag"])
+    prepared = ml_engine.prepare_data(data)
+    try:
+        model, accuracy = ml_engine.fit_models({"Tree": ml_engine.DecisionTreeClassifier(random_state=0)},
+                                               *prepared.split(), n_jobs=1, scaled=prepared.scaled())["Tree"]
+    finally:
+        prepared.close()
+    assert accuracy == 1.0
+
+
+def fitted_entry(rows):
+    return ml_engine.FittedModel(ml_engine.DecisionTreeClassifier(), 0.5, np.zeros(rows), np.zeros(rows))
+
+
+def stored_keys(store):
+    return sorted(entry["model"] for entry in store.entries())
+
+
+def test_model_store_round_trip_and_purge(tmp_path):
+    store = ml_engine.ModelStore(str(tmp_path / "store"))
+    assert store.get(("data", "tree")) is None
+
+    store.put(("data", "tree"), fitted_entry(10))
+    entry = store.get(("data", "tree"))
+    assert entry.accuracy == 0.5
+    assert len(entry.predictions) == 10
+    assert store.entries()[0]["data_key"] == "data"
+
+    store.trial_log(("data", "random", 4)).record("trial", score=0.5)
+    assert store.purge() == 1
+    assert store.entries() == []
+    assert store.get(("data", "tree")) is None
+    assert os.listdir(str(tmp_path / "store" / "searches")) == []
+
+
+def test_model_store_evicts_least_recently_used(tmp_path):
+    store = ml_engine.ModelStore(str(tmp_path / "store"), max_bytes=10 ** 9)
+    for index, name in enumerate(["a", "b", "c"]):
+        store.put(("data", name), fitted_entry(1000))
+        os.utime(store._path(("data", name)), (index, index))
+    size = store.entries()[0]["bytes"]
+
+    # Reading "a" makes "b" the least recently used
+    store.get(("data", "a"))
+    store.max_bytes = 2 * size + size // 2
+    store.evict()
+    assert stored_keys(store) == ["a", "c"]
+
+
+def test_model_store_keeps_newest_entry_and_skips_oversized_ones(tmp_path):
+    store = ml_engine.ModelStore(str(tmp_path / "store"))
+    store.put(("data", "small"), fitted_entry(10))
+    size = store.entries()[0]["bytes"]
+
+    # An entry over the whole budget is not stored, and doesn't wipe the rest
+    store.max_bytes = size * 3
+    store.put(("data", "huge"), fitted_entry(100000))
+    assert stored_keys(store) == ["small"]
+
+    # Going over budget evicts the older entries, never the newest one
+    os.utime(store._path(("data", "small")), (0, 0))
+    store.put(("data", "medium"), fitted_entry(size // 16))
+    assert stored_keys(store) == ["medium", "small"]
+    store.max_bytes = 1
+    store.evict()
+    assert stored_keys(store) == ["medium"]
+
+
+def search_data():
+    from sklearn.datasets import make_classification
+
+    return make_classification(n_samples=2000, n_features=8, random_state=0)
+
+
+def logged_trials(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_search_resumes_from_its_trial_log(tmp_path):
+    X, y = search_data()
+    models = {"Logistic Regression": ml_engine.LogisticRegression(max_iter=1000)}
+    path = str(tmp_path / "trials.jsonl")
+
+    first = ml_engine.search_models(models, X, y, "random", budget=4, time_limit=None, n_jobs=2,
+                                    log=ml_engine.TrialLog(path))
+    assert len(logged_trials(path)) == 4
+
+    again = ml_engine.search_models(models, X, y, "random", budget=4, time_limit=None, n_jobs=2,
+                                    log=ml_engine.TrialLog(path))
+    assert again == first
+    assert len(logged_trials(path)) == 4  # Every trial came from the log
+
+
+def test_halving_keeps_the_best_third_for_the_full_data(tmp_path):
+    X, y = search_data()
+    path = str(tmp_path / "trials.jsonl")
+    results = ml_engine.search_models({"Logistic Regression": ml_engine.LogisticRegression(max_iter=1000)}, X, y,
+                                      "halving", budget=9, time_limit=None, folds=3, eta=3, n_jobs=2,
+                                      log=ml_engine.TrialLog(path))
+
+    # Six configurations on a third of the rows, then the best two on all of them
+    trials = logged_trials(path)
+    assert sorted(trial["resource"] for trial in trials) == [666] * 6 + [2000] * 2
+    promoted = [trial["params"] for trial in trials if trial["resource"] == 2000]
+    first_rung = {repr(trial["params"]): trial["score"] for trial in trials if trial["resource"] == 666}
+    promoted_keys = {repr(params) for params in promoted}
+    kept = [score for params, score in first_rung.items() if params in promoted_keys]
+    dropped = [score for params, score in first_rung.items() if params not in promoted_keys]
+    assert len(kept) == 2 and min(kept) >= max(dropped)
+
+    result = results["Logistic Regression"]
+    assert result.trials == 8 and result.finished
+    assert result.best_params in promoted
+
+
+def test_search_stops_at_the_time_limit():
+    X, y = search_data()
+    models = {"Random Forest": ml_engine.RandomForestClassifier(n_estimators=200)}
+    start = time.monotonic()
+    results = ml_engine.search_models(models, X, y, "random", budget=20, time_limit=0.5, n_jobs=2)
+    assert time.monotonic() - start < 10
+    assert all(not result.finished for result in results.values())
+
+    # The killed workers are replaced for the next search
+    results = ml_engine.search_models({"Logistic Regression": ml_engine.LogisticRegression(max_iter=1000)}, X, y,
+                                      "random", budget=2, time_limit=None, n_jobs=2)
+    assert results["Logistic Regression"].finished
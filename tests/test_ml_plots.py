@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_plots import reservoir_sample
+
+
+def stream(rows, chunk_rows):
+    for start in range(0, rows, chunk_rows):
+        yield pd.DataFrame({"row": np.arange(start, min(start + chunk_rows, rows))})
+
+
+def test_short_stream_is_kept_whole():
+    sample = reservoir_sample(stream(50, 7), size=100)
+    assert sample["row"].tolist() == list(range(50))
+
+
+def test_sample_has_size_distinct_rows_from_the_stream():
+    sample = reservoir_sample(stream(10000, 333), size=500, random_state=1)
+    rows = sample["row"]
+    assert len(rows) == 500
+    assert rows.is_unique
+    assert rows.between(0, 9999).all()
+    assert rows.tolist() == reservoir_sample(stream(10000, 333), size=500, random_state=1)["row"].tolist()
+
+
+def test_every_row_is_equally_likely_to_be_kept():
+    counts = np.zeros(10)
+    for seed in range(100):
+        sample = reservoir_sample(stream(1000, 150), size=50, random_state=seed)
+        counts += np.bincount(sample["row"] // 100, minlength=10)
+    # 500 picks expected per block of 100 rows; early rows must not be favoured over late ones
+    assert np.all(np.abs(counts - 500) < 100)
+
+
+def test_empty_stream_is_rejected():
+    with pytest.raises(ValueError):
+        reservoir_sample(iter([]), size=10)